@@ -0,0 +1,219 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |          Offline throughput/latency benchmark of the symbology chat bot   --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries
+import os
+import sys
+import time
+import getopt
+import random
+import signal
+import threading
+import subprocess
+
+# The bot memory is read with psutil if it is installed (pip install psutil), otherwise with the resource module
+# (not available on Windows, the memory is not reported)
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from stub_servers import StubRestServer, StubWebSocketServer, LatencyRecorder
+
+benchmark_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(os.path.dirname(benchmark_dir), 'src')
+fake_modules_dir = os.path.join(benchmark_dir, 'fake_modules')
+
+usage = '''Usage: python benchmark_chatbot.py [options]
+    --app=<file>            chat bot application file in src folder (default chatbot_demo_symbology.py)
+    --messages=<n>          number of chat messages to send (default 1000)
+    --rate=<n>              chat messages per second, 0 for as fast as possible (default 0)
+    --rooms=<n>             number of chatrooms (default 4)
+    --symbols=<n>           number of distinct symbols, smaller value gives more cache hits (default 200)
+    --latency=<seconds>     fake ek.get_data latency (default 0.05)
+    --error-rate=<p>        fake ek.get_data exception probability (default 0)
+    --not-found-rate=<p>    fake ek.get_data not found probability (default 0)
+    --rate-limit-every=<n>  answer every n-th chatroom post with HTTP 429, 0 to disable (default 0)
+    --timeout=<seconds>     maximum seconds to wait for all replies (default 120)
+'''
+
+
+class MemoryMonitor:
+
+    '''
+    Record the peak resident memory (KB) of the bot process by sampling it with psutil every interval seconds.
+    Without psutil, max_rss_kb() returns the maximum RSS of the child processes from the resource module, or None.
+    '''
+
+    # Constructor function
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self._max_rss = 0
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if psutil is not None:
+            self._thread = threading.Thread(target=self._run, name='memory-monitor', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            process = psutil.Process(self.pid)
+            while not self._stopped.wait(self.interval):
+                self._max_rss = max(self._max_rss, process.memory_info().rss)
+        except psutil.Error: # The bot process has exited
+            pass
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def max_rss_kb(self):
+        if psutil is not None:
+            return self._max_rss / 1024.0
+        if resource is not None:
+            return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        return None
+
+
+# Start the chat bot process. On Windows the bot runs in its own process group, so it can be stopped with CTRL_BREAK_EVENT
+def start_bot(app, env):
+    creationflags = subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0
+    return subprocess.Popen([sys.executable, os.path.join(src_dir, app)], cwd=src_dir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, creationflags=creationflags)
+
+
+# Stop the chat bot process with SIGINT (CTRL_BREAK_EVENT on Windows), it is terminated if it does not exit in 10 seconds
+def stop_bot(bot_process):
+    try:
+        bot_process.send_signal(signal.CTRL_BREAK_EVENT if os.name == 'nt' else signal.SIGINT)
+        bot_process.wait(10)
+        return
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        pass
+    bot_process.terminate()
+    try:
+        bot_process.wait(10)
+    except subprocess.TimeoutExpired:
+        bot_process.kill()
+        bot_process.wait()
+
+
+# Return the value at percentile (0-100) of a sorted list
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+def run_benchmark(app='chatbot_demo_symbology.py', messages=1000, rate=0, rooms=4, symbols=200,
+                  latency=0.05, error_rate=0.0, not_found_rate=0.0, rate_limit_every=0, timeout=120):
+    recorder = LatencyRecorder()
+    recorder.expected = messages
+    room_ids = ['bench-room-%d' % index for index in range(rooms)]
+    rest_server = StubRestServer(room_ids, on_post=recorder.on_post, rate_limit_every=rate_limit_every)
+    ws_server = StubWebSocketServer()
+    rest_server.start()
+    ws_server.start()
+
+    # The chat bot reads the endpoints from the environment variables, load_dotenv does not override them
+    env = dict(os.environ,
+               PYTHONPATH=os.pathsep.join([fake_modules_dir, src_dir]),
+               BOT_USERNAME='bench-bot', BOT_PASSWORD='bench-password', MESSENGER_APPKEY='bench-appkey', EIKON_APPKEY='bench-appkey',
+               MESSENGER_BOT_WS_ENDPOINT=ws_server.url, RDP_GATEWAY_URL=rest_server.url,
+               MESSENGER_BOT_REST_ENDPOINT='/messenger/beta1', RDP_AUTH_VERSION='/v1', RDP_AUTH_ENDPOINT='/auth/oauth2',
+               SYMBOLOGY_STORE_FILE='', QUOTA_SENDER_PER_MINUTE='0', QUOTA_ROOM_PER_MINUTE='0',
+               FAKE_EIKON_LATENCY=str(latency), FAKE_EIKON_ERROR_RATE=str(error_rate), FAKE_EIKON_NOT_FOUND_RATE=str(not_found_rate))
+    print('Starting %s' % app)
+    bot_process = start_bot(app, env)
+    memory_monitor = MemoryMonitor(bot_process.pid)
+    memory_monitor.start()
+    try:
+        if not ws_server.connected.wait(30):
+            print('The chat bot did not connect to the stub WebSocket server')
+            return None
+
+        print('Sending %d chat messages' % messages)
+        interval = 1.0 / rate if rate else 0
+        for index in range(messages):
+            symbol = 'BENCH%d.X' % random.randrange(symbols)
+            recorder.sent(symbol)
+            ws_server.send_post(room_ids[index % rooms], 'Please convert %s to ISIN' % symbol)
+            if interval:
+                time.sleep(interval)
+        recorder.all_replied.wait(timeout)
+    finally:
+        stop_bot(bot_process)
+        memory_monitor.stop()
+        ws_server.stop()
+        rest_server.stop()
+
+    latencies = sorted(recorder.latencies)
+    elapsed = (recorder.last_reply_tm or time.perf_counter()) - (recorder.first_sent_tm or time.perf_counter())
+    return {
+        'messages': messages,
+        'replies': recorder.replies,
+        'elapsed_s': elapsed,
+        'messages_per_s': recorder.replies / elapsed if elapsed > 0 else 0.0,
+        'latency_p50_ms': percentile(latencies, 50) * 1000,
+        'latency_p99_ms': percentile(latencies, 99) * 1000,
+        'latency_max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+        'bot_max_rss_kb': memory_monitor.max_rss_kb(),
+        'rest_calls': dict(rest_server.calls),
+        'ws_commands': dict(ws_server.commands)
+    }
+
+
+# =============================== Main Process ========================================
+if __name__ == '__main__':
+
+    options = {}
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'h', ['help', 'app=', 'messages=', 'rate=', 'rooms=', 'symbols=',
+                                                      'latency=', 'error-rate=', 'not-found-rate=', 'rate-limit-every=', 'timeout='])
+    except getopt.GetoptError as error:
+        print(error)
+        print(usage)
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(usage)
+            sys.exit(0)
+        elif opt == '--app':
+            options['app'] = arg
+        elif opt in ('--latency', '--error-rate', '--not-found-rate', '--timeout'):
+            options[opt[2:].replace('-', '_')] = float(arg)
+        else:
+            options[opt[2:].replace('-', '_')] = int(arg)
+
+    result = run_benchmark(**options)
+    if not result:
+        sys.exit(1)
+
+    print('Replies          : %d/%d' % (result['replies'], result['messages']))
+    print('Throughput       : %.1f messages/s' % result['messages_per_s'])
+    print('Latency p50      : %.1f ms' % result['latency_p50_ms'])
+    print('Latency p99      : %.1f ms' % result['latency_p99_ms'])
+    print('Latency max      : %.1f ms' % result['latency_max_ms'])
+    if result['bot_max_rss_kb'] is not None:
+        print('Bot max RSS      : %.1f MB' % (result['bot_max_rss_kb'] / 1024.0))
+    else:
+        print('Bot max RSS      : not available (pip install psutil)')
+    print('REST calls       : %s' % result['rest_calls'])
+    print('WebSocket commands: %s' % result['ws_commands'])
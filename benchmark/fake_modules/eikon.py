@@ -0,0 +1,79 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |    Fake Eikon Data API module for the offline chat bot benchmark          --
+# |-----------------------------------------------------------------------------
+
+"""
+Stand-in for the 'eikon' package used by dapi_session.py in the benchmark. Put this folder in front of
+PYTHONPATH and the chat bot imports it instead of the real Eikon Data API. The behaviour is configured
+with the following environment variables:
+    - FAKE_EIKON_LATENCY: seconds each get_data call takes (default 0.05)
+    - FAKE_EIKON_ERROR_RATE: probability of a get_data exception (default 0)
+    - FAKE_EIKON_NOT_FOUND_RATE: probability of a 'not found' result per instrument (default 0)
+"""
+
+# Import the required libraries
+import os
+import time
+import random
+import zlib
+
+latency = float(os.getenv('FAKE_EIKON_LATENCY', '0.05'))
+error_rate = float(os.getenv('FAKE_EIKON_ERROR_RATE', '0'))
+not_found_rate = float(os.getenv('FAKE_EIKON_NOT_FOUND_RATE', '0'))
+
+# Workspace field and its display name
+display_names = {'TR.RIC': 'RIC', 'TR.ISIN': 'ISIN', 'TR.SEDOL': 'SEDOL', 'TR.CUSIP': 'CUSIP',
+                 'TR.LipperRICCode': 'Lipper RIC Code', 'TR.OrganizationID': 'Organization PermID'}
+
+
+def set_app_key(app_key):
+    pass
+
+
+def get_port_number():
+    return '9000'
+
+
+# Create a deterministic instrument code from the instrument and field names
+def fake_code(instrument, field):
+    if field == 'TR.RIC':
+        return instrument.upper()
+    checksum = zlib.crc32(('%s|%s' % (instrument.upper(), field)).encode('utf-8'))
+    return '%s%010d' % (display_names.get(field, 'XX')[:2].upper(), checksum)
+
+
+# Return the same raw_output structure as eikon.get_data(instruments, fields, raw_output=True)
+def get_data(instruments, fields, raw_output=False):
+    time.sleep(latency)
+    if random.random() < error_rate:
+        raise Exception('Fake Eikon Data API: get_data failure')
+
+    instruments = [instruments] if isinstance(instruments, str) else list(instruments)
+    fields = [fields] if isinstance(fields, str) else list(fields)
+    response = {
+        'columnHeadersCount': 1,
+        'headerOrientation': 'horizontal',
+        'headers': [[{'displayName': 'Instrument'}] + [{'displayName': display_names.get(field, field), 'field': field} for field in fields]],
+        'rowHeadersCount': 1,
+        'totalColumnsCount': len(fields) + 1,
+        'totalRowsCount': len(instruments) + 1,
+        'data': []
+    }
+    errors = []
+    for row_index, instrument in enumerate(instruments):
+        if random.random() < not_found_rate:
+            response['data'].append([instrument] + [None] * len(fields))
+            errors.extend({'code': 412, 'col': column_index, 'message': 'Unable to resolve all requested identifiers.', 'row': row_index}
+                          for column_index in range(1, len(fields) + 1))
+        else:
+            response['data'].append([instrument] + [fake_code(instrument, field) for field in fields])
+    if errors:
+        response['error'] = errors
+    return response
@@ -0,0 +1,235 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |  Local stand-in Messenger BOT API (REST + WebSocket) and RDP token servers --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for HTTP, WebSocket and JSON operations
+import re
+import json
+import time
+import asyncio
+import threading
+from collections import deque, defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import websockets
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+
+    # The chat bot process is stopped at the end of the benchmark, ignore its reset connections
+    def handle_error(self, request, client_address):
+        pass
+
+
+class StubRestServer:
+
+    '''
+    Local HTTP server that mimics the RDP token endpoint and the Messenger BOT API chatroom endpoints.
+    Each chatroom post is passed to the on_post(room_id, message) function.
+    '''
+
+    # Constructor function
+    def __init__(self, rooms, on_post=None, expires_in=600, rate_limit_every=0):
+        self.rooms = rooms
+        self.on_post = on_post
+        self.expires_in = expires_in
+        self.rate_limit_every = rate_limit_every  # answer every N-th post with HTTP 429, 0 to disable
+        self.calls = defaultdict(int)  # number of calls per endpoint and HTTP status
+        self._lock = threading.Lock()
+        self._posts = 0
+        self._server = QuietHTTPServer(('127.0.0.1', 0), self._create_handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%d' % self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-rest-server', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, endpoint, status):
+        with self._lock:
+            self.calls['%s %d' % (endpoint, status)] += 1
+
+    def _create_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # The headers and body are written separately, avoid the delayed ACK wait
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, endpoint, status, body, headers=None):
+                stub._count(endpoint, status)
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                match = re.search(r'/(managed_chatrooms|chatrooms)$', self.path)
+                if match:
+                    rooms = [] if match.group(1) == 'managed_chatrooms' else [{'chatroomId': room_id} for room_id in stub.rooms]
+                    self._reply(match.group(1), 200, {'chatrooms': rooms})
+                else:
+                    self._reply('unknown', 404, {})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+                if self.path.endswith('/token'):
+                    self._reply('token', 200, {'access_token': 'stub-access-token', 'refresh_token': 'stub-refresh-token',
+                                               'expires_in': str(stub.expires_in), 'scope': 'trapi.messenger', 'token_type': 'Bearer'})
+                    return
+                match = re.search(r'/(?:managed_chatrooms|chatrooms)/([^/]+)/(join|leave|post)$', self.path)
+                if not match:
+                    self._reply('unknown', 404, {})
+                    return
+                room_id, action = match.groups()
+                if action == 'post':
+                    with stub._lock:
+                        stub._posts += 1
+                        rate_limited = stub.rate_limit_every and stub._posts % stub.rate_limit_every == 0
+                    if rate_limited:
+                        self._reply(action, 429, {'error': 'Too Many Requests'}, {'Retry-After': '0'})
+                        return
+                    if stub.on_post is not None:
+                        stub.on_post(room_id, json.loads(body or b'{}').get('message', ''))
+                self._reply(action, 200, {})
+
+        return Handler
+
+
+class StubWebSocketServer:
+
+    '''
+    Local WebSocket server speaking the 'messenger-json' subprotocol. It waits for the bot 'connect' request,
+    then the benchmark pushes chatroomPost events with send_post(room_id, text).
+    '''
+
+    # Constructor function
+    def __init__(self):
+        self.connected = threading.Event()
+        self.commands = defaultdict(int)
+        self._loop = asyncio.new_event_loop()
+        self._clients = set()
+        self._server = None
+        self._port = None
+        self._started = threading.Event()
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'ws://127.0.0.1:%d' % self._port
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stub-websocket-server', daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(
+            websockets.serve(self._handler, '127.0.0.1', 0, subprotocols=['messenger-json']))
+        self._port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+
+    async def _close(self):
+        for client in list(self._clients):
+            await client.close()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handler(self, web_socket, path=None):
+        self._clients.add(web_socket)
+        try:
+            async for message in web_socket:
+                request = json.loads(message)
+                self.commands[request.get('command')] += 1
+                await web_socket.send(json.dumps({'reqId': request.get('reqId'), 'event': request.get('command') + 'Response'}))
+                if request.get('command') == 'connect':
+                    self.connected.set()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.discard(web_socket)
+
+    # Push a chatroomPost event to all connected bots
+    def send_post(self, room_id, text, sender='trader@example.com'):
+        event = json.dumps({'event': 'chatroomPost', 'chatroomId': room_id,
+                            'post': {'message': text, 'sender': {'email': sender}}})
+        asyncio.run_coroutine_threadsafe(self._broadcast(event), self._loop)
+
+    async def _broadcast(self, event):
+        for client in list(self._clients):
+            await client.send(event)
+
+
+class LatencyRecorder:
+
+    '''
+    Match each chatroomPost sent by the benchmark with the bot reply by the symbol in the message text,
+    the replies of the same symbol are matched in the sent order. Greeting and help posts do not have a symbol.
+    Only the requested symbol of a reply is matched ('code of <symbol> is', 'cannot convert <symbol>' or a table row),
+    not the "did you mean" suggestions of a not found reply.
+    '''
+
+    symbol_pattern = re.compile(r'(?:code of\s+|cannot convert |^)(BENCH\d+\.X)\b', re.MULTILINE)
+
+    # Constructor function
+    def __init__(self):
+        self._sent = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.replies = 0
+        self.first_sent_tm = None
+        self.last_reply_tm = None
+        self.all_replied = threading.Event()
+        self.expected = 0
+
+    def sent(self, symbol):
+        now = time.perf_counter()
+        with self._lock:
+            self._sent[symbol].append(now)
+            if self.first_sent_tm is None:
+                self.first_sent_tm = now
+
+    def on_post(self, room_id, message):
+        now = time.perf_counter()
+        # A post can contain several merged replies
+        with self._lock:
+            for symbol in self.symbol_pattern.findall(message):
+                pending = self._sent.get(symbol)
+                if not pending:
+                    continue
+                self.latencies.append(now - pending.popleft())
+                self.replies += 1
+                self.last_reply_tm = now
+            if self.expected and self.replies >= self.expected:
+                self.all_replied.set()
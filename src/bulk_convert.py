@@ -0,0 +1,217 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |       Bulk CSV symbology conversion with the Eikon Data API               --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for CSV, file and thread operations
+import os
+import sys
+import csv
+import time
+import getopt
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from dotenv import load_dotenv
+
+
+class BulkConverter:
+
+    '''
+    Stream the instruments of an input CSV file through chunked ek.get_data calls and write a CSV file of
+    symbol,<target 1>,<target 2>,... rows in the input order (an empty value if the symbol is not found).
+        - Up to concurrency chunks of chunk_size rows are converted at the same time, so the memory use does not
+          depend on the input file size.
+        - Each converted chunk is appended and flushed to the output file. If the output file exists, the rows that
+          are already converted are skipped (resume after an interruption).
+        - acquire(cost) is called before each chunk conversion with the number of (symbol, field) conversions of the
+          chunk, it blocks until the chunk can be converted (e.g. the chat bot conversion quotas).
+    '''
+
+    # Bulk conversion parameters
+    chunk_size = 500  # rows
+    concurrency = 4  # chunks
+    progress_interval = 10  # chunks between progress log messages
+
+    # Constructor function, dapi is a DAPISessionManagement object and target_symbol_types the list of ek.get_data fields
+    def __init__(self, dapi, target_symbol_types, column_names=None, chunk_size=500, concurrency=4, acquire=None):
+        self.dapi = dapi
+        self.acquire = acquire
+        self.target_symbol_types = list(target_symbol_types)
+        self.column_names = list(column_names) if column_names else list(target_symbol_types)
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+
+    '''
+    Convert the symbol_column (index or header name) of input_file and write the result to output_file.
+    Returns the conversion statistics dictionary.
+    '''
+    def convert_file(self, input_file, output_file, symbol_column=0, has_header=True, resume=True):
+        start_tm = time.perf_counter()
+        done_rows = self._completed_rows(output_file) if resume else 0
+        stats = {'rows': 0, 'converted': 0, 'not_found': 0, 'resumed_rows': done_rows}
+
+        with open(input_file, newline='', encoding='utf-8-sig') as input_csv, \
+                open(output_file, 'a' if resume else 'w', newline='', encoding='utf-8') as output_csv:
+            reader = csv.reader(input_csv)
+            writer = csv.writer(output_csv)
+
+            column_index = symbol_column
+            if has_header:
+                header = next(reader, [])
+                if not isinstance(symbol_column, int):
+                    column_index = header.index(symbol_column)
+            if output_csv.tell() == 0:
+                writer.writerow(['symbol'] + self.column_names)
+
+            # Skip the rows that are already in the output file
+            symbols = (row[column_index].strip() for row in reader if len(row) > column_index)
+            for _ in islice(symbols, done_rows):
+                pass
+
+            pending = deque()
+            chunk_count = 0
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='bulk-convert') as executor:
+                while True:
+                    chunk = list(islice(symbols, self.chunk_size))
+                    if chunk:
+                        pending.append((chunk, executor.submit(self._convert_chunk, chunk)))
+                    # Write the oldest chunk when the window is full (or at the end of the input), keeping the input order
+                    if pending and (len(pending) >= self.concurrency or not chunk):
+                        done_chunk, future = pending.popleft()
+                        self._write_chunk(writer, done_chunk, future.result(), stats)
+                        output_csv.flush()
+                        chunk_count += 1
+                        if chunk_count % self.progress_interval == 0:
+                            logging.info('Bulk conversion: %d rows converted' % (done_rows + stats['rows']))
+                    elif not chunk:
+                        break
+
+        stats['elapsed_s'] = time.perf_counter() - start_tm
+        return stats
+
+    def _convert_chunk(self, symbols):
+        unique_symbols = list(dict.fromkeys(symbol for symbol in symbols if symbol))
+        if not unique_symbols:
+            return {}
+        if self.acquire is not None:
+            self.acquire(len(unique_symbols) * len(self.target_symbol_types))
+        return self.dapi.convert_symbology(unique_symbols, self.target_symbol_types)
+
+    def _write_chunk(self, writer, symbols, results, stats):
+        rows = []
+        for symbol in symbols:
+            fields = results.get(symbol, {})
+            values = [self._converted_value(fields.get(target_symbol_type)) for target_symbol_type in self.target_symbol_types]
+            rows.append([symbol] + values)
+            stats['rows'] += 1
+            if any(values):
+                stats['converted'] += 1
+            else:
+                stats['not_found'] += 1
+        writer.writerows(rows)
+
+    # Return the converted instrument code of a (converted_result, response) tuple, or an empty string
+    @staticmethod
+    def _converted_value(conversion_result):
+        if not conversion_result or not conversion_result[0]:
+            return ''
+        return conversion_result[1]['data'][0][1]
+
+    '''
+    Return the number of converted rows in an existing output file (without the header row).
+    A partially written last line is removed, so it is converted again.
+    '''
+    @staticmethod
+    def _completed_rows(output_file):
+        if not os.path.exists(output_file):
+            return 0
+        lines = 0
+        complete_size = 0
+        with open(output_file, 'rb') as output:
+            for line in output:
+                if not line.endswith(b'\n'):
+                    break
+                lines += 1
+                complete_size += len(line)
+        if complete_size != os.path.getsize(output_file):
+            with open(output_file, 'r+b') as output:
+                output.truncate(complete_size)
+        return max(0, lines - 1)
+
+
+usage = '''Usage: python bulk_convert.py -i <input csv> -o <output csv> -t <fields> [options]
+    -i, --input=<file>          input CSV file of instruments
+    -o, --output=<file>         output CSV file, an existing file is resumed
+    -t, --targets=<fields>      comma separated ek.get_data fields, e.g. TR.ISIN,TR.CUSIP
+    -c, --column=<index|name>   symbol column index or header name (default 0)
+    --no-header                 the input file does not have a header row
+    --chunk-size=<n>            instruments per ek.get_data call (default 500)
+    --concurrency=<n>           concurrent ek.get_data calls (default 4)
+    --restart                   overwrite the output file instead of resuming it
+'''
+
+# =============================== Main Process, bulk CSV conversion ============================
+if __name__ == '__main__':
+
+    from dapi_session import DAPISessionManagement # Module for managing Eikon Data API session
+    from symbology_backend import create_backend # Module for the Eikon Data API and fixture file symbology backends
+
+    # take environment variables from .env.
+    load_dotenv()
+    logging.basicConfig(format='%(asctime)s: %(levelname)s:%(name)s :%(message)s', level=logging.INFO, datefmt='%Y-%m-%d %H:%M:%S')
+
+    options = {'column': '0', 'has_header': True, 'chunk_size': 500, 'concurrency': 4, 'resume': True}
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'hi:o:t:c:', ['help', 'input=', 'output=', 'targets=', 'column=', 'no-header',
+                                                            'chunk-size=', 'concurrency=', 'restart'])
+    except getopt.GetoptError as error:
+        print(error)
+        print(usage)
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(usage)
+            sys.exit(0)
+        elif opt in ('-i', '--input'):
+            options['input'] = arg
+        elif opt in ('-o', '--output'):
+            options['output'] = arg
+        elif opt in ('-t', '--targets'):
+            options['targets'] = [target.strip() for target in arg.split(',') if target.strip()]
+        elif opt in ('-c', '--column'):
+            options['column'] = arg
+        elif opt == '--no-header':
+            options['has_header'] = False
+        elif opt == '--chunk-size':
+            options['chunk_size'] = int(arg)
+        elif opt == '--concurrency':
+            options['concurrency'] = int(arg)
+        elif opt == '--restart':
+            options['resume'] = False
+
+    if not options.get('input') or not options.get('output') or not options.get('targets'):
+        print(usage)
+        sys.exit(2)
+
+    print('Setting Eikon Data API App Key')
+    backend = create_backend(os.getenv('SYMBOLOGY_BACKEND', 'eikon').strip().lower(), os.getenv('EIKON_APPKEY'),
+                             os.getenv('SYMBOLOGY_FIXTURE_FILE', './symbology_fixture.json'))
+    dapi_session = DAPISessionManagement(os.getenv('EIKON_APPKEY'), chunk_size=options['chunk_size'], backend=backend)
+    if not dapi_session.verify_desktop_connection():
+        print('Please start Refinitiv Workspace in your local machine')
+        sys.exit(1)
+
+    converter = BulkConverter(dapi_session, options['targets'], chunk_size=options['chunk_size'], concurrency=options['concurrency'])
+    column = int(options['column']) if options['column'].isdigit() else options['column']
+    result = converter.convert_file(options['input'], options['output'], column, options['has_header'], options['resume'])
+    print('Converted %d rows (%d found, %d not found, %d resumed) in %.1f seconds' % (
+        result['rows'], result['converted'], result['not_found'], result['resumed_rows'], result['elapsed_s']))
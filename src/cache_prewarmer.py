@@ -0,0 +1,168 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |   Symbology cache prewarming from a watchlist file and the chat history   --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for thread and time operations
+import re
+import logging
+import threading
+import time
+from collections import Counter
+
+from symbology_cache import normalize_symbol
+
+# Separator of the symbols of a watchlist line
+_watchlist_separator_pattern = re.compile(r'[,;\s]+')
+
+
+# Read the symbols of a watchlist file, one or more comma/space separated symbols per line, '#' starts a comment
+def read_watchlist(file_name):
+    symbols = []
+    with open(file_name, encoding='utf-8') as watchlist:
+        for line in watchlist:
+            line = line.split('#', 1)[0]
+            symbols.extend(symbol for symbol in _watchlist_separator_pattern.split(line) if symbol)
+    return symbols
+
+
+class CachePrewarmer:
+
+    '''
+    Convert the popular symbols on a background thread when the chat bot starts, so the first requests of these symbols
+    are served from the symbology cache. The watchlist symbols are converted first, then the most requested symbols of
+    the chat history, up to max_symbols symbols. Each batch of batch_size symbols is converted with one
+    dapi.convert_symbology call (one ek.get_data call per dapi chunk_size symbols), the concurrent chat requests of the
+    same symbols wait for the prewarm requests instead of calling ek.get_data again.
+    The prewarm lookups are cache misses, hit_rate_since_prewarm() returns the cache hit rate of the lookups after prewarming.
+    '''
+
+    # Constructor function, dapi is a DAPISessionManagement object with a symbology cache and target_symbol_types the list of
+    # Workspace fields (e.g. ['TR.ISIN', 'TR.RIC']) of each prewarmed symbol
+    def __init__(self, dapi, target_symbol_types, batch_size=500, max_symbols=1000):
+        self.dapi = dapi
+        self.target_symbol_types = list(target_symbol_types)
+        self.batch_size = max(1, batch_size)
+        self.max_symbols = max_symbols
+        self._thread = None
+        self._cache_stats = None  # cache statistics after prewarming
+        self._stats = {'state': 'idle', 'watchlist_symbols': 0, 'history_requests': 0, 'symbols': 0, 'batches': 0,
+                       'converted': 0, 'not_found': 0, 'errors': 0, 'elapsed_s': 0.0}
+        self._lock = threading.Lock()
+
+    '''
+    Start prewarming on a background thread. load_watchlist and load_history are functions called on the background
+    thread (they can call REST APIs): load_watchlist returns the list of watchlist symbols and load_history returns the
+    list of the requested symbols of the chat history, a symbol is repeated for each request.
+    '''
+    def start(self, load_watchlist=None, load_history=None):
+        self._thread = threading.Thread(target=self.run, args=(load_watchlist, load_history), name='cache-prewarm', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def run(self, load_watchlist=None, load_history=None):
+        self._update(state='loading')
+        start_tm = time.monotonic()
+        watchlist_symbols = self._load('watchlist', load_watchlist)
+        requested_symbols = self._load('chat history', load_history)
+        symbols = self.select_symbols(watchlist_symbols, requested_symbols)
+        self._update(state='running', watchlist_symbols=len(watchlist_symbols), history_requests=len(requested_symbols),
+                     symbols=len(symbols), batches=(len(symbols) + self.batch_size - 1) // self.batch_size)
+        logging.info('Cache prewarm: converting %d symbols (%d watchlist symbols, %d chat history requests) to %s'
+                     % (len(symbols), len(watchlist_symbols), len(requested_symbols), ', '.join(self.target_symbol_types)))
+
+        resolved = set()  # normalized symbols of the success and 'not found' results, they are cached
+        for batch_number, offset in enumerate(range(0, len(symbols), self.batch_size), start=1):
+            batch = symbols[offset:offset + self.batch_size]
+            try:
+                results = self.dapi.convert_symbology(batch, self.target_symbol_types)
+            except Exception as error:
+                logging.error('Cache prewarm: batch %d failure: %s' % (batch_number, error))
+                with self._lock:
+                    self._stats['errors'] += len(batch) * len(self.target_symbol_types)
+                continue
+            counts = Counter()
+            for symbol, fields in results.items():
+                if all(response is not None for _, response in fields.values()):
+                    resolved.add(normalize_symbol(symbol))
+                for converted_result, response in fields.values():
+                    counts['converted' if converted_result else 'not_found' if response is not None else 'errors'] += 1
+            with self._lock:
+                for name, count in counts.items():
+                    self._stats[name] += count
+                self._stats['elapsed_s'] = round(time.monotonic() - start_tm, 3)
+                progress = dict(self._stats)
+            logging.info('Cache prewarm: batch %d/%d, %d/%d symbols, %d converted, %d not found, %d errors in %.1f seconds'
+                         % (batch_number, progress['batches'], min(offset + len(batch), len(symbols)), len(symbols),
+                            progress['converted'], progress['not_found'], progress['errors'], progress['elapsed_s']))
+
+        self._cache_stats = self._symbology_cache_stats()
+        self._update(state='done', elapsed_s=round(time.monotonic() - start_tm, 3))
+        if requested_symbols:
+            # Hit rate of the chat history requests with a cold cache (the first request of each symbol is a miss)
+            # and with the prewarmed cache
+            requested_keys = [normalize_symbol(symbol) for symbol in requested_symbols]
+            cold_hit_rate = 1 - len(set(requested_keys)) / len(requested_keys)
+            prewarmed_hit_rate = sum(1 for key in requested_keys if key in resolved) / len(requested_keys)
+            logging.info('Cache prewarm: chat history hit rate %.1f%% with a cold cache, %.1f%% with the prewarmed cache'
+                         % (cold_hit_rate * 100, prewarmed_hit_rate * 100))
+        logging.info('Cache prewarm: done, %s' % self.stats())
+
+    def _load(self, source, load_symbols):
+        if load_symbols is None:
+            return []
+        try:
+            return list(load_symbols())
+        except Exception as error:
+            logging.error('Cache prewarm: cannot load the %s: %s' % (source, error))
+            return []
+
+    # Return the symbols to prewarm: the watchlist symbols in file order, then the most requested symbols, without duplicates
+    def select_symbols(self, watchlist_symbols, requested_symbols):
+        symbols = {}
+        request_counts = Counter()
+        spellings = {}  # normalized symbol and its first requested spelling
+        for symbol in requested_symbols:
+            key = normalize_symbol(symbol)
+            request_counts[key] += 1
+            spellings.setdefault(key, symbol)
+        ranked_symbols = [spellings[key] for key, _ in request_counts.most_common()]
+        for symbol in list(watchlist_symbols) + ranked_symbols:
+            if len(symbols) >= self.max_symbols:
+                break
+            symbols.setdefault(normalize_symbol(symbol), symbol)
+        return list(symbols.values())
+
+    def _update(self, **values):
+        with self._lock:
+            self._stats.update(values)
+
+    def _symbology_cache_stats(self):
+        if self.dapi.symbology_cache is None:
+            return None
+        return self.dapi.symbology_cache.stats()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # Return the symbology cache hit rate of the lookups after prewarming, or None before prewarming is done
+    def hit_rate_since_prewarm(self):
+        if self._cache_stats is None:
+            return None
+        cache_stats = self._symbology_cache_stats()
+        hits = cache_stats['hits'] - self._cache_stats['hits']
+        lookups = hits + cache_stats['misses'] - self._cache_stats['misses']
+        return (hits / lookups) if lookups else 0.0
+
+    # Return prewarm statistics for logging/monitoring purpose
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['hit_rate_since_prewarm'] = self.hit_rate_since_prewarm()
+        return stats
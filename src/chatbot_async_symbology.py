@@ -0,0 +1,269 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |   Refinitiv Messenger BOT API Chat Bot with Eikon Data API (asyncio)      --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for asyncio, HTTP, WebSocket and JSON operations
+import sys
+import ssl
+import random
+import logging
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import websockets
+
+from rdp_token import RDPTokenManagement # Module for managing RDP session
+from chatroom_registry import ChatroomRegistry # Module for keeping the joined chatrooms state
+import json_codec # Module for the fast JSON encoding and decoding of the WebSocket messages
+from log_utils import LazyJson, configure_logging # Module for lazy and redacted logging
+import chatbot_demo_symbology as bot # Chat bot settings, message templates and message handler
+
+# Authentication and connection objects
+access_token = None
+refresh_token = None
+expire_time = 0
+
+# Chatroom objects, chatroom_id is the default chatroom for messages without chatroomId
+chatroom_id = None
+joined_rooms = ChatroomRegistry()
+
+# Executor for the blocking RDP authentication and Eikon Data API calls
+executor_workers = bot.pipeline_workers or 4
+executor = None
+
+
+# =============================== RDP and Messenger BOT API coroutines ========================================
+
+
+async def authen_rdp(rdp_token_object):  # Call RDPTokenManagement to get authentication in the executor
+    global access_token, refresh_token, expire_time
+    loop = asyncio.get_running_loop()
+    auth_token = await loop.run_in_executor(executor, lambda: rdp_token_object.get_token(save_token_to_file=False, current_refresh_token=refresh_token))
+    if auth_token:
+        access_token, refresh_token, expire_time = auth_token['access_token'], auth_token['refresh_token'], int(auth_token['expires_in'])
+        return True
+    return False
+
+
+def chatroom_url(room_id=None, action=None, room_is_managed=False):  # Create Messenger BOT API chatroom URL
+    url = '{}{}/{}'.format(bot.gw_url, bot.bot_api_base_path, 'managed_chatrooms' if room_is_managed else 'chatrooms')
+    if room_id is not None:
+        url = '{}/{}/{}'.format(url, room_id, action)
+    return url
+
+
+# Get List of Chatrooms via HTTP REST
+async def list_chatrooms(client, room_is_managed=False):
+    try:
+        response = await client.get(chatroom_url(room_is_managed=room_is_managed), headers={'Authorization': 'Bearer {}'.format(access_token)})
+    except httpx.HTTPError as e:
+        logging.error('Messenger BOT API: List Chatroom exception failure: %s' % e)
+        return None
+
+    if response.status_code == 200:  # HTTP Status 'OK'
+        print('Messenger BOT API: get chatroom  success')
+        return response.json()
+    print('Messenger BOT API: get chatroom result failure:', response.status_code, response.reason_phrase)
+    print('Text:', response.text)
+    return None
+
+
+# Join chatroom via HTTP REST
+async def join_chatroom(client, room_id, room_is_managed=False):
+    try:
+        response = await client.post(chatroom_url(room_id, 'join', room_is_managed), headers={'Authorization': 'Bearer {}'.format(access_token)})
+    except httpx.HTTPError as e:
+        logging.error('Messenger BOT API: join chatroom exception failure: %s' % e)
+        return False
+
+    if response.status_code == 200:  # HTTP Status 'OK'
+        joined_rooms.set_joined(room_id, True, room_is_managed)
+        print('Messenger BOT API: join chatroom success')
+        return True
+    print('Messenger BOT API: join chatroom result failure:', response.status_code, response.reason_phrase)
+    print('Text:', response.text)
+    return False
+
+
+# Join all chatrooms and managed chatrooms of the bot, returns the number of joined chatrooms
+async def join_all_chatrooms(client):
+    for room_is_managed in (False, True):
+        chatroom_respone = await list_chatrooms(client, room_is_managed)
+        if chatroom_respone:
+            for chatroom in chatroom_respone.get('chatrooms', []):
+                joined_rooms.add(chatroom['chatroomId'], room_is_managed, chatroom.get('name'))
+
+    await asyncio.gather(*[join_chatroom(client, room_id, room_is_managed) 
+                           for room_id, room_is_managed in joined_rooms.rooms(joined_only=False) if room_id not in joined_rooms])
+    return len(joined_rooms)
+
+
+# Posting Messages to a Chatroom via HTTP REST
+async def post_message_to_chatroom(client, room_id, text, room_is_managed=None):
+    if room_is_managed is None:
+        room_is_managed = joined_rooms.is_managed(room_id)
+    if room_id not in joined_rooms and not await join_chatroom(client, room_id, room_is_managed):
+        return
+
+    try:
+        response = await client.post(chatroom_url(room_id, 'post', room_is_managed), json={'message': text},
+                                     headers={'Authorization': 'Bearer {}'.format(access_token)})
+    except httpx.HTTPError as e:
+        logging.error('Messenger BOT API: post message to exception failure: %s ' % e)
+        return
+
+    if response.status_code == 200:  # HTTP Status 'OK'
+        logging.debug('Messenger BOT API: post message to chatroom success')
+    else:
+        print('Messenger BOT API: post message to failure:', response.status_code, response.reason_phrase)
+        print('Text:', response.text)
+
+
+# Leave a joined Chatroom via HTTP REST
+async def leave_chatroom(client, room_id):
+    if room_id not in joined_rooms:
+        return
+    room_is_managed = joined_rooms.is_managed(room_id)
+    try:
+        response = await client.post(chatroom_url(room_id, 'leave', room_is_managed), headers={'Authorization': 'Bearer {}'.format(access_token)})
+        if response.status_code == 200:  # HTTP Status 'OK'
+            print('Messenger BOT API: leave chatroom success')
+        else:
+            print('Messenger BOT API: leave chatroom failure:', response.status_code, response.reason_phrase)
+    except httpx.HTTPError as e:
+        logging.error('Messenger BOT API: leave chatroom exception failure: %s' % e)
+    joined_rooms.set_joined(room_id, False)
+
+
+# =============================== WebSocket coroutines ========================================
+
+
+# Send a connect (on open) or authenticate (token refresh) request message to Messenger ChatBot API WebSocket server
+async def send_ws_request(web_socket, command):
+    request_msg = bot.ws_request_templates[command] % (random.randint(0, 1000000), json_codec.dumps(access_token))
+    await web_socket.send(request_msg)
+    logging.info('Sent: %s command' % command)
+
+
+# Refresh the RDP token 60 seconds before it expires, then update the token on the WebSocket connection
+async def refresh_token_loop(web_socket, rdp_token):
+    while True:
+        if expire_time <= 60:
+            # Fail the refresh since value too small
+            raise RuntimeError('Token expire time %s is too small' % expire_time)
+        await asyncio.sleep(expire_time - 60)
+
+        print('Refresh Token ')
+        if not await authen_rdp(rdp_token):
+            raise RuntimeError('Refresh Token failure')
+        await send_ws_request(web_socket, 'authenticate')
+
+
+# Convert the message in the executor, then post the reply after the previous message of the same chatroom is replied
+async def process_message(client, message_json, previous_task):
+    loop = asyncio.get_running_loop()
+    reply = await loop.run_in_executor(executor, bot.handle_message, message_json)
+    if previous_task is not None:
+        await asyncio.wait([previous_task])
+    if reply:
+        await post_message_to_chatroom(client, *reply)
+
+
+# Receive messages from the WebSocket connection, each chatroomPost message is processed in its own task
+async def receive_loop(web_socket, client):
+    room_tasks = {}  # last task of each chatroom, for keeping the reply order
+    async for message in web_socket:
+        message_json = json_codec.decode_event(message)
+        if bot.message_log_sampler.sample('received'):
+            logging.debug('Received: %s', LazyJson(message))
+        if message_json.get('event') != 'chatroomPost':
+            continue
+        room_id = message_json.get('chatroomId', chatroom_id)
+        task = asyncio.ensure_future(process_message(client, message_json, room_tasks.get(room_id)))
+        room_tasks[room_id] = task
+        task.add_done_callback(lambda done, room_id=room_id: forget_room_task(room_tasks, room_id, done))
+
+
+def forget_room_task(room_tasks, room_id, task):  # Remove a finished task if it is still the last task of its chatroom
+    if room_tasks.get(room_id) is task:
+        del room_tasks[room_id]
+
+
+# =============================== Main Process ========================================
+async def main():
+    global chatroom_id, executor
+
+    executor = ThreadPoolExecutor(max_workers=executor_workers)
+    loop = asyncio.get_running_loop()
+
+    print('Setting Eikon Data API App Key')
+    bot.dapi = await loop.run_in_executor(executor, bot.create_dapi_session)
+    if not await loop.run_in_executor(executor, bot.dapi.verify_desktop_connection):
+        print('Please start Refinitiv Workspace in your local machine')
+        return 1
+    print('Initiate Eikon Data API success')
+
+    print('Getting RDP Authentication Token')
+    rdp_token = RDPTokenManagement(bot.bot_username, bot.bot_password, bot.app_key, 30)
+    if not await authen_rdp(rdp_token):
+        return 1
+    print('Successfully Authenticated ')
+
+    async with httpx.AsyncClient() as client:
+        # List and join all associated Chatrooms and managed Chatrooms
+        print('Get and Join Rooms ')
+        if not await join_all_chatrooms(client):
+            return 1
+        chatroom_id = next(iter(joined_rooms))
+        bot.chatroom_id = chatroom_id
+        # The bulk conversion threads post their replies on the event loop with this client
+        bot.background_reply_handler = lambda room_id, text: asyncio.run_coroutine_threadsafe(
+            post_message_to_chatroom(client, room_id, text), loop)
+        print('Joined %d Chatrooms' % len(joined_rooms))
+
+        # Send Greeting message
+        await asyncio.gather(*[post_message_to_chatroom(client, room_id, 'Hi, I am a chatbot symbology converter.\n\n' + bot.help_message)
+                               for room_id in joined_rooms])
+
+        print('Connecting to WebSocket %s ... ' % (bot.ws_url))
+        ssl_context = ssl.create_default_context()
+        ssl_context.check_hostname = False
+        try:
+            async with websockets.connect(bot.ws_url, subprotocols=['messenger-json'],
+                                          ssl=ssl_context if bot.ws_url.startswith('wss') else None) as web_socket:
+                logging.info('WebSocket Connection is established')
+                await send_ws_request(web_socket, 'connect')
+                tasks = [asyncio.ensure_future(receive_loop(web_socket, client)),
+                         asyncio.ensure_future(refresh_token_loop(web_socket, rdp_token))]
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in pending:
+                    task.cancel()
+                for task in done:
+                    if task.exception():
+                        logging.error('Error: %s' % task.exception())
+        finally:
+            logging.error('WebSocket Connection Closed')
+            bot.background_reply_handler = None
+            await asyncio.gather(*[leave_chatroom(client, room_id) for room_id in joined_rooms])
+            executor.shutdown(wait=False)
+    return 1
+
+
+# Running the demo
+if __name__ == '__main__':
+
+    # Setting Python Logging
+    configure_logging(bot.log_level)
+
+    try:
+        sys.exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        pass
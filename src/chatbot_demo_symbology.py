@@ -16,11 +16,12 @@ import time
 import getopt
 import requests
 import socket
-import json
-import websocket
 import threading
 import random
+import math
 import logging
+import atexit
+import multiprocessing
 from dotenv import load_dotenv
 
 from string import Template
@@ -28,6 +29,27 @@ import re
 
 from rdp_token import RDPTokenManagement # Module for managing RDP session
 from dapi_session import DAPISessionManagement # Module for managing Eikon Data API session
+from symbology_backend import create_backend # Module for the Eikon Data API and fixture file symbology backends
+from symbology_cache import SymbologyCache # Module for caching symbology conversion results
+from symbology_store import SymbologyStore # Module for keeping symbology conversion results across restarts
+from message_pipeline import MessagePipeline # Module for processing chat messages with a worker pool
+from http_session import HTTPSessionManagement # Module for the pooled keep-alive HTTP session
+from chatroom_registry import ChatroomRegistry # Module for keeping the joined chatrooms state
+from command_router import CommandRouter # Module for dispatching chat commands to their handlers
+from token_scheduler import TokenRefreshScheduler # Module for refreshing RDP token on a background thread
+from ws_supervisor import WebSocketSupervisor # Module for reconnecting the WebSocket connection
+from outbound_queue import OutboundQueue # Module for batching and rate limiting the reply messages
+import json_codec # Module for the fast JSON encoding and decoding of the WebSocket messages and REST bodies
+from log_utils import LazyJson, LogSampler, get_log_level, configure_logging # Module for lazy and redacted logging
+from metrics import registry, MetricsServer # Module for the Prometheus metrics endpoint
+from bulk_convert import BulkConverter # Module for converting the CSV files of instruments
+from reference_index import ReferenceIndex # Module for the local memory-mapped symbology reference index
+from symbol_suggester import SymbolSuggester # Module for the "did you mean" suggestions of the not found symbols
+from cache_prewarmer import CachePrewarmer, read_watchlist # Module for prewarming the symbology cache at startup
+from request_quota import RequestQuota # Module for the per-sender and per-chatroom conversion quotas
+from circuit_breaker import CircuitBreaker # Module for failing fast while the Eikon Data API is not available
+from consistent_hash import HashRing # Module for assigning the chatrooms to the worker processes
+from shared_cache import start_shared_cache, connect_shared_cache, connect_shared_quota # Module for the symbology cache and quotas shared by the worker processes
 
 # take environment variables from .env.
 load_dotenv()
@@ -41,57 +63,214 @@ app_key = os.getenv('MESSENGER_APPKEY')
 # Input your Refinitiv Workspace/Eikon Desktop Eikon Data API App Key
 data_api_appkey = os.getenv('EIKON_APPKEY')
 
-# Setting Log level the supported value is 'logging.INFO' and 'logging.DEBUG'
-log_level = logging.DEBUG
+# Setting Log level from the LOG_LEVEL environment variable, the supported values are 'DEBUG', 'INFO', 'WARNING' and 'ERROR'
+log_level = get_log_level(logging.INFO)
+# Log only one of every LOG_SAMPLE_EVERY received/sent chat messages at DEBUG level
+message_log_sampler = LogSampler(int(os.getenv('LOG_SAMPLE_EVERY', '1')))
 
-# Authentication and connection objects
-auth_token = None
+# Authentication and connection objects, access_token is updated by the token_scheduler after each refresh
 access_token = None
-expire_time = 0
-logged_in = False
+token_scheduler = None
 
-refresh_token = None
-# Chatroom objects
+# Token refresh settings, the token is refreshed TOKEN_REFRESH_MARGIN seconds (minus a random jitter) before it expires
+token_refresh_margin = int(os.getenv('TOKEN_REFRESH_MARGIN', '60'))
+token_refresh_jitter = int(os.getenv('TOKEN_REFRESH_JITTER', '10'))
+
+# WebSocket reconnect backoff settings
+ws_reconnect_delay = float(os.getenv('WS_RECONNECT_DELAY', '1'))
+ws_max_reconnect_delay = float(os.getenv('WS_MAX_RECONNECT_DELAY', '60'))
+web_socket_app = None
+
+# Local Prometheus metrics endpoint http://METRICS_HOST:METRICS_PORT/metrics, set METRICS_PORT to 0 to disable the endpoint
+metrics_host = os.getenv('METRICS_HOST', '127.0.0.1')
+metrics_port = int(os.getenv('METRICS_PORT', '0'))
+
+# Chat bot metrics
+websocket_messages = registry.counter('websocket_messages_total', 'WebSocket messages by direction and event/command', ['direction', 'type'])
+message_handle_latency = registry.histogram('chat_message_handle_seconds', 'Latency of creating a reply for an incoming message (including the conversion)')
+
+# Seconds between statistics log messages
+stats_log_interval = int(os.getenv('STATS_LOG_INTERVAL', '300'))
+# Chatroom objects, chatroom_id is the default chatroom for messages without chatroomId
 chatroom_id = None
-joined_rooms = None
+joined_rooms = ChatroomRegistry()
 
 # Please verify below URL is correct via the WS lookup
 ws_url = os.getenv('MESSENGER_BOT_WS_ENDPOINT')
 gw_url = os.getenv('RDP_GATEWAY_URL')
 bot_api_base_path = os.getenv('MESSENGER_BOT_REST_ENDPOINT')
 
+# Pooled HTTP session for all Messenger BOT API and RDP calls, the current access_token is added to each request
+http_session = HTTPSessionManagement(
+    pool_size = int(os.getenv('HTTP_POOL_SIZE', '10')),
+    timeout = float(os.getenv('HTTP_TIMEOUT', '10')),
+    retries = int(os.getenv('HTTP_RETRIES', '3')),
+    backoff_factor = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5')),
+    token_provider = lambda: access_token)
+
+
+# Worker processes settings, with BOT_WORKERS (or --workers) > 1 this process keeps the WebSocket connection and the RDP token,
+# and the chatrooms are assigned to BOT_WORKERS worker processes that convert and reply with a shared symbology cache
+bot_workers = int(os.getenv('BOT_WORKERS', '1'))
+worker_check_interval = 5  # seconds between worker process liveness checks
+worker_processes = []
+worker_queues = []  # ('message', raw WebSocket message) or ('token', access token) items of each worker, None stops the worker
+worker_ring = None
+shared_cache_manager = None
+shared_cache_authkey = None
+room_id_pattern = re.compile(r'"chatroomId"\s*:\s*"([^"]+)"')
+
 
 # =============================== Data API and Symbology Variables ========================================
 
 dapi = None
 
-# Conversion request message Regular Expression pattern
+# Symbology conversion result cache settings
+symbology_cache_size = int(os.getenv('SYMBOLOGY_CACHE_SIZE', '10000'))
+symbology_cache_ttl = int(os.getenv('SYMBOLOGY_CACHE_TTL', '3600'))
+symbology_cache_not_found_ttl = int(os.getenv('SYMBOLOGY_CACHE_NOT_FOUND_TTL', '60'))
+
+# Persistent symbology store settings, leave SYMBOLOGY_STORE_FILE empty to disable the store. Each worker process writes
+# its own <file name>-worker<n> store file
+symbology_store_file = os.getenv('SYMBOLOGY_STORE_FILE', '')
+symbology_store_max_age = int(os.getenv('SYMBOLOGY_STORE_MAX_AGE', '86400'))
+
+# Message processing pipeline settings, set PIPELINE_WORKERS to 0 to process messages on the WebSocket thread
+pipeline_workers = int(os.getenv('PIPELINE_WORKERS', '4'))
+pipeline_queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', '1000'))
+message_pipeline = None
+
+# Outbound reply queue settings, the replies of a chatroom within OUTBOUND_BATCH_WINDOW seconds are merged into one post.
+# Set OUTBOUND_RATE_LIMIT to 0 for unlimited posts per second
+outbound_batch_window = float(os.getenv('OUTBOUND_BATCH_WINDOW', '0.2'))
+outbound_max_batch_messages = int(os.getenv('OUTBOUND_MAX_BATCH_MESSAGES', '50'))
+outbound_rate_limit = float(os.getenv('OUTBOUND_RATE_LIMIT', '5'))
+outbound_burst = int(os.getenv('OUTBOUND_BURST', '10'))
+outbound_queue = None
+
+# Local symbology reference index file (built with reference_index.py), leave REFERENCE_INDEX_FILE empty to disable the index
+reference_index_file = os.getenv('REFERENCE_INDEX_FILE', '')
+
+# "Did you mean" suggestions of the successfully converted symbols for the not found symbols, SUGGEST_MAX_SIZE=0 disables
+# the suggestions. With SYMBOL_PREVALIDATE=true a symbol that the Data API returned as not found and that is close to a known symbol
+# is not requested again from the Data API (for one day), the other unknown symbols are always requested
+suggest_max_distance = int(os.getenv('SUGGEST_MAX_DISTANCE', '2'))
+suggest_max_size = int(os.getenv('SUGGEST_MAX_SIZE', '50000'))
+symbol_prevalidate = os.getenv('SYMBOL_PREVALIDATE', 'false').strip().lower() in ('1', 'true', 'yes')
+symbol_suggester = SymbolSuggester(suggest_max_distance, max_size=suggest_max_size) if suggest_max_size > 0 else None
+
+# Data API circuit breaker settings, DATA_API_FAILURE_THRESHOLD consecutive ek.get_data failures (or calls slower than
+# DATA_API_SLOW_CALL_THRESHOLD seconds) stop the calls for DATA_API_RESET_TIMEOUT seconds, the conversions are answered
+# from the stale cached results meanwhile. DATA_API_FAILURE_THRESHOLD=0 disables the circuit breaker
+data_api_failure_threshold = int(os.getenv('DATA_API_FAILURE_THRESHOLD', '5'))
+data_api_reset_timeout = float(os.getenv('DATA_API_RESET_TIMEOUT', '30'))
+data_api_slow_call_threshold = float(os.getenv('DATA_API_SLOW_CALL_THRESHOLD', '10'))
+
+# Conversion quotas, each (symbol, target symbol type) conversion takes one token of the sender and the chatroom quota,
+# a bulk conversion waits for the tokens of each chunk.
+# A sender can convert QUOTA_SENDER_PER_MINUTE instrument codes per minute with bursts of QUOTA_SENDER_BURST codes (0 for unlimited)
+quota_sender_per_minute = float(os.getenv('QUOTA_SENDER_PER_MINUTE', '120'))
+quota_sender_burst = int(os.getenv('QUOTA_SENDER_BURST', '60'))
+quota_room_per_minute = float(os.getenv('QUOTA_ROOM_PER_MINUTE', '600'))
+quota_room_burst = int(os.getenv('QUOTA_ROOM_BURST', '200'))
+quota_settings = (quota_sender_per_minute / 60, quota_sender_burst, quota_room_per_minute / 60, quota_room_burst)
+request_quota = RequestQuota(*quota_settings)  # the worker processes use the quotas of the shared cache manager
+conversion_throttled = registry.counter('conversion_requests_throttled_total', 'Conversion requests rejected by the sender or chatroom quota', ['scope'])
+
+# Fair scheduling of the queued messages, the senders of a chatroom are served in weighted round-robin order.
+# FAIR_SENDER_WEIGHTS gives more turns to some senders, e.g. 'desk@example.com=3,ops@example.com=2' (default weight 1)
+fair_sender_weights = {email.strip(): int(weight) for email, weight in
+                       (item.split('=', 1) for item in os.getenv('FAIR_SENDER_WEIGHTS', '').split(',') if '=' in item)}
+
+# Symbology data backend: 'eikon' (Eikon Data API with Refinitiv Workspace) or 'fixture' (the local SYMBOLOGY_FIXTURE_FILE
+# JSON file, for testing without Refinitiv Workspace, each request waits SYMBOLOGY_FIXTURE_LATENCY seconds)
+symbology_backend = os.getenv('SYMBOLOGY_BACKEND', 'eikon').strip().lower()
+symbology_fixture_file = os.getenv('SYMBOLOGY_FIXTURE_FILE', './symbology_fixture.json')
+symbology_fixture_latency = float(os.getenv('SYMBOLOGY_FIXTURE_LATENCY', '0'))
+
+# Maximum number of instruments in each ek.get_data call of a multiple symbols conversion request
+dapi_chunk_size = int(os.getenv('DAPI_CHUNK_SIZE', '100'))
+
+# Bulk CSV conversion settings, the 'Please bulk convert <file name> to <target symbol type>' command converts a CSV file
+# of BULK_CONVERT_DIR folder to a <file name>_converted.csv file. Leave BULK_CONVERT_DIR empty to disable the command
+bulk_convert_dir = os.getenv('BULK_CONVERT_DIR', '')
+bulk_convert_chunk_size = int(os.getenv('BULK_CONVERT_CHUNK_SIZE', '500'))
+bulk_convert_concurrency = int(os.getenv('BULK_CONVERT_CONCURRENCY', '2'))
+bulk_convert_request_pattern = r'Please bulk convert (?P<file_name>\S+) to (?P<target_symbol_type>.*)'
+bulk_convert_running = set()  # file names that are being converted
+background_reply_handler = None  # function(room_id, response_message) of the bulk conversion replies, send_reply if it is not set
+bulk_convert_lock = threading.Lock()
+
+# Symbology cache prewarm settings, the symbols of PREWARM_WATCHLIST_FILE (one or more symbols per line) and, with
+# PREWARM_CHAT_HISTORY=true, the most requested symbols of the last PREWARM_HISTORY_POSTS posts of each joined chatroom are
+# converted to PREWARM_SYMBOL_TYPES on a background thread while the WebSocket connection is opened
+prewarm_watchlist_file = os.getenv('PREWARM_WATCHLIST_FILE', '')
+prewarm_chat_history = os.getenv('PREWARM_CHAT_HISTORY', 'false').strip().lower() in ('1', 'true', 'yes')
+prewarm_history_posts = int(os.getenv('PREWARM_HISTORY_POSTS', '200'))
+prewarm_symbol_types = os.getenv('PREWARM_SYMBOL_TYPES', 'ALL')
+prewarm_batch_size = int(os.getenv('PREWARM_BATCH_SIZE', '500'))
+prewarm_max_symbols = int(os.getenv('PREWARM_MAX_SYMBOLS', '1000'))
+cache_prewarmer = None
+
+# Conversion request message Regular Expression pattern, the <symbol> and <target symbol type> can be a comma or space separated list
 symbology_request_pattern = r'Please convert (?P<symbol>.*) to (?P<target_symbol_type>.*)'
+symbol_list_separator_pattern = re.compile(r'[,\s]+')
 
 # Response messages templates
 response_template = Template('@$sender, the $target_symbol_type instrument code of  $symbol is $converted_symbol')
 response_error_template = Template('@$sender, the $target_symbol_type instrument code of $symbol is not available')
+response_table_template = Template('@$sender, the $target_symbol_type instrument codes are\n$converted_table')
+response_table_row_template = Template('$symbol | $converted_symbols')
+response_suggestion_template = Template('$response_message. Did you mean $suggestions?')
+response_throttled_sender_template = Template('@$sender, you have reached your conversion quota ($rate instrument codes per minute). Please try again in $wait seconds')
+response_too_large_template = Template('@$sender, a request can convert up to $burst instrument codes ($scope quota), '
+    'please split the request into smaller requests')
+response_throttled_room_template = Template('@$sender, this chatroom has reached its conversion quota ($rate instrument codes per minute). Please try again in $wait seconds')
+response_stats_template = Template('@$sender, conversion usage\n'
+    'You: $sender_usage\n'
+    'This chatroom: $room_usage\n'
+    'Messages waiting: $pending')
+response_unavailable_template = Template('@$sender, cannot convert $symbol to $target_symbol_type, the Eikon Data API is temporarily unavailable. Please try again later')
 response_unsupported_type_template = Template('@$sender, unsupported <target symbol type> $target_symbol_type\n'
-    'The supported <target symbol type> are: CUSIP, ISIN, SEDOL, RIC, lipperID and OAPermID\n')
+    'The supported <target symbol type> are: CUSIP, ISIN, SEDOL, RIC, lipperID, OAPermID and ALL\n')
 
 response_unsupported_command = Template('@$sender, unsupported command. Please use the following command to convert instrument code\n'
     '"Please convert <symbol> to <target symbol type>"\n'
     '\n'
     'Example:\n'
-    'Please convert IBM.N to ISIN')
+    'Please convert IBM.N to ISIN\n'
+    'Please convert IBM.N, VOD.L, MSFT.O to ISIN\n'
+    'Please convert IBM.N to ISIN, SEDOL, CUSIP\n'
+    'Please convert IBM.N to ALL')
+
+response_bulk_started_template = Template('@$sender, converting $file_name to $target_symbol_type, the result will be written to $output_file_name')
+response_bulk_done_template = Template('@$sender, $output_file_name is ready: $rows instruments ($converted found, $not_found not found) in $elapsed seconds')
+response_bulk_error_template = Template('@$sender, cannot convert $file_name: $error')
 
                             
 # Dictionary to map between input <target symbol type> and Refinitiv Workspace instrument type fields
 symbol_dict = {'RIC':'TR.RIC','ISIN':'TR.ISIN','SEDOL':'TR.SEDOL',
     'CUSIP':'TR.CUSIP','lipperID':'TR.LipperRICCode','OAPermID':'TR.OrganizationID'}
+# <target symbol type> for requesting all symbol_dict fields
+all_symbol_types = 'ALL'
+# Case-insensitive index of the input <target symbol type>, e.g. 'isin' and 'LIPPERID' are accepted
+symbol_type_aliases = {symbol_type.lower(): symbol_type for symbol_type in symbol_dict}
 
 # Help/Instruction Message
 help_message = ('You can ask me to convert instrument code with this command\n'
     '"Please convert <symbol> to <target symbol type>"\n'
-    'The supported <target symbol type> are: CUSIP, ISIN, SEDOL, RIC, lipperID and OAPermID\n'
+    'The supported <target symbol type> are: CUSIP, ISIN, SEDOL, RIC, lipperID, OAPermID and ALL\n'
     '\n'
     'Example:\n'
-    'Please convert IBM.N to ISIN')
+    'Please convert IBM.N to ISIN\n'
+    'Please convert IBM.N, VOD.L, MSFT.O to ISIN\n'
+    'Please convert IBM.N to ISIN, SEDOL, CUSIP\n'
+    'Please convert IBM.N to ALL\n'
+    '\n'
+    'Send /stats to see your conversion usage and quota')
+if bulk_convert_dir: # The bulk conversion command is enabled
+    help_message += ('\n\nConvert a CSV file of instruments (header row, symbols in the first column) of the bulk conversion folder with\n'
+        '"Please bulk convert <file name> to <target symbol type>"')
 
 
 # =============================== RDP and Messenger BOT API functions ========================================
@@ -99,12 +278,22 @@ help_message = ('You can ask me to convert instrument code with this command\n'
 
 def authen_rdp(rdp_token_object):  # Call RDPTokenManagement to get authentication
     # Based on WebSocket application behavior, the Authentication will not read/write Token from rest-token.txt file
-    auth_token = rdp_token_object.get_token(save_token_to_file=False,  current_refresh_token = refresh_token)
-    if auth_token:
-        # return RDP access token (sts_token) ,refresh_token , expire_in values and RDP login status
-        return auth_token['access_token'], auth_token['refresh_token'], auth_token['expires_in'] , True
-    else:
-        return None,None, 0, False
+    # returns the TokenRefreshScheduler object that keeps the RDP access token, or None if the authentication fails
+    scheduler = TokenRefreshScheduler(rdp_token_object, token_refresh_margin, token_refresh_jitter)
+    if scheduler.refresh():
+        return scheduler
+    return None
+
+
+# Called by the token_scheduler thread after each successful token refresh
+def on_token_refresh(new_access_token):
+    global access_token
+    access_token = new_access_token
+    # The worker processes post with the same token
+    for worker_queue in worker_queues:
+        worker_queue.put(('token', new_access_token))
+    # Update authentication token to the WebSocket connection.
+    send_ws_keepalive(access_token)
 
 
 # Get List of Chatrooms Function via HTTP REST
@@ -117,15 +306,15 @@ def list_chatrooms(access_token, room_is_managed=False):
 
     response = None
     try:
-        # Send a HTTP request message with Python requests module
-        response = requests.get(
-            url, headers={'Authorization': 'Bearer {}'.format(access_token)})
+        # Send a HTTP request message with the pooled HTTP session
+        response = http_session.get(url, access_token=access_token)
     except requests.exceptions.RequestException as e:
         logging.error('Messenger BOT API: List Chatroom exception failure: %s' % e)
+        return None, None
 
     if response.status_code == 200:  # HTTP Status 'OK'
         print('Messenger BOT API: get chatroom  success')
-        logging.info('Receive: %s' % (json.dumps(response.json(),sort_keys=True, indent=2, separators=(',', ':'))))
+        logging.info('Receive: %s', LazyJson(response))
         return response.status_code, response.json()
     else:
         print('Messenger BOT API: get chatroom result failure:',response.status_code, response.reason)
@@ -134,8 +323,27 @@ def list_chatrooms(access_token, room_is_managed=False):
     
 
 
-def join_chatroom(access_token, room_id=None, room_is_managed=False):  # Join chatroom
-    joined_rooms = []
+# Get the last posts of a Chatroom via HTTP REST, returns the list of posts (an empty list if the request fails)
+def list_chatroom_posts(access_token, room_id, room_is_managed=False, limit=100):
+    if room_is_managed:
+        url = '{}{}/managed_chatrooms/{}/posts'.format(gw_url, bot_api_base_path, room_id)
+    else:
+        url = '{}{}/chatrooms/{}/posts'.format(gw_url, bot_api_base_path, room_id)
+
+    try:
+        response = http_session.get(url, access_token=access_token, params={'limit': limit})
+    except requests.exceptions.RequestException as e:
+        logging.error('Messenger BOT API: list chatroom posts exception failure: %s' % e)
+        return []
+
+    if response.status_code == 200:  # HTTP Status 'OK'
+        logging.debug('Receive: %s', LazyJson(response))
+        return response.json().get('posts', [])
+    logging.warning('Messenger BOT API: list chatroom %s posts failure: %s %s' % (room_id, response.status_code, response.reason))
+    return []
+
+
+def join_chatroom(access_token, room_id=None, room_is_managed=False):  # Join chatroom, returns True if success
     if room_is_managed:
         url = '{}{}/managed_chatrooms/{}/join'.format(
             gw_url, bot_api_base_path, room_id)
@@ -145,31 +353,48 @@ def join_chatroom(access_token, room_id=None, room_is_managed=False):  # Join ch
 
     response = None
     try:
-        # Send a HTTP request message with Python requests module
-        response = requests.post(
-            url, headers={'Authorization': 'Bearer {}'.format(access_token)})
+        # Send a HTTP request message with the pooled HTTP session
+        response = http_session.post(url, access_token=access_token)
     except requests.exceptions.RequestException as e:
         logging.error('Messenger BOT API: join chatroom exception failure: %s' % e)
+        return False
 
     if response.status_code == 200:  # HTTP Status 'OK'
-        joined_rooms.append(room_id)
+        joined_rooms.set_joined(room_id, True, room_is_managed)
         print('Messenger BOT API: join chatroom success')
-        logging.info('Receive: %s' % (json.dumps(response.json(),sort_keys=True, indent=2, separators=(',', ':'))))
+        logging.info('Receive: %s', LazyJson(response))
+        return True
     else:
         print('Messenger BOT API: join chatroom result failure:',
               response.status_code, response.reason)
         print('Text:', response.text)
+        return False
 
-    return joined_rooms
 
+# Join all chatrooms and managed chatrooms of the bot, returns the number of joined chatrooms
+def join_all_chatrooms(access_token):
+    for room_is_managed in (False, True):
+        status, chatroom_respone = list_chatrooms(access_token, room_is_managed)
+        if chatroom_respone:
+            for chatroom in chatroom_respone.get('chatrooms', []):
+                joined_rooms.add(chatroom['chatroomId'], room_is_managed, chatroom.get('name'))
 
+    for room_id, room_is_managed in joined_rooms.rooms(joined_only=False):
+        if room_id not in joined_rooms:
+            join_chatroom(access_token, room_id, room_is_managed)
+    return len(joined_rooms)
 
-# Posting Messages to a Chatroom via HTTP REST
-def post_message_to_chatroom(access_token,  joined_rooms, room_id=None,  text='', room_is_managed=False):
+
+
+# Posting Messages to a Chatroom via HTTP REST, the room_is_managed value is taken from the joined_rooms registry if it is not set.
+# With retry_rate_limited=False a HTTP 429 response is returned without retries (the outbound queue retries the post)
+def post_message_to_chatroom(access_token,  joined_rooms, room_id=None,  text='', room_is_managed=None, retry_rate_limited=True):
+    if room_is_managed is None:
+        room_is_managed = joined_rooms.is_managed(room_id)
     if room_id not in joined_rooms:
-        joined_rooms = join_chatroom(access_token, room_id, room_is_managed)
+        join_chatroom(access_token, room_id, room_is_managed)
 
-    if joined_rooms:
+    if room_id in joined_rooms:
         if room_is_managed:
             url = '{}{}/managed_chatrooms/{}/post'.format(
                 gw_url, bot_api_base_path, room_id)
@@ -177,39 +402,38 @@ def post_message_to_chatroom(access_token,  joined_rooms, room_id=None,  text=''
             url = '{}{}/chatrooms/{}/post'.format(
                 gw_url, bot_api_base_path, room_id)
 
-        body = {
-            'message': text
-        }
+        # Serialize the body once from the pre-serialized template, the same JSON string is logged and sent
+        body = post_body_template % json_codec.dumps(text)
 
         # Print for debugging purpose
-        logging.info('Sent: %s' % (json.dumps(
-            body, sort_keys=True, indent=2, separators=(',', ':'))))
+        if message_log_sampler.sample('sent'):
+            logging.debug('Sent: %s', body)
 
         response = None
         try:
-            # Send a HTTP request message with Python requests module
-            response = requests.post(
-                url=url, data=json.dumps(body), headers={'Authorization': 'Bearer {}'.format(access_token)})
+            # Send a HTTP request message with the pooled HTTP session
+            response = http_session.post(url, access_token=access_token, data=body.encode('utf-8'), retry_rate_limited=retry_rate_limited)
         except requests.exceptions.RequestException as e:
             logging.error('Messenger BOT API: post message to exception failure: %s ' % e)
+            return None
 
         if response.status_code == 200:  # HTTP Status 'OK'
-            joined_rooms.append(room_id)
-            print('Messenger BOT API: post message to chatroom success')
             # Print for debugging purpose
-            logging.info('Receive: %s' % (json.dumps(
-                response.json(), sort_keys=True, indent=2, separators=(',', ':'))))
+            logging.debug('Messenger BOT API: post message to chatroom success: %s', response.text)
         else:
             print('Messenger BOT API: post message to failure:',
                   response.status_code, response.reason)
             print('Text:', response.text)
-    pass
+        return response
+    return None
 
 
 # Leave a joined Chatroom
-def leave_chatroom(access_token, joined_rooms, room_id=None, room_is_managed=False):
+def leave_chatroom(access_token, joined_rooms, room_id=None, room_is_managed=None):
 
     if room_id in joined_rooms:
+        if room_is_managed is None:
+            room_is_managed = joined_rooms.is_managed(room_id)
         if room_is_managed:
             url = '{}{}/managed_chatrooms/{}/leave'.format(
                 gw_url, bot_api_base_path, room_id)
@@ -219,145 +443,531 @@ def leave_chatroom(access_token, joined_rooms, room_id=None, room_is_managed=Fal
 
         response = None
         try:
-            # Send a HTTP request message with Python requests module
-            response = requests.post(
-                url, headers={'Authorization': 'Bearer {}'.format(access_token)})
+            # Send a HTTP request message with the pooled HTTP session
+            response = http_session.post(url, access_token=access_token)
         except requests.exceptions.RequestException as e:
             logging.error('Messenger BOT API: leave chatroom exception failure: %s' % e)
 
-        if response.status_code == 200:  # HTTP Status 'OK'
+        if response is None:
+            pass
+        elif response.status_code == 200:  # HTTP Status 'OK'
             print('Messenger BOT API: leave chatroom success')
-            logging.info('Receive: %s' % (json.dumps(response.json(), sort_keys=True, indent=2, separators=(',', ':'))))
+            logging.info('Receive: %s', LazyJson(response))
         else:
             print('Messenger BOT API: leave chatroom failure:',
                   response.status_code, response.reason)
             print('Text:', response.text)
 
-        joined_rooms.remove(room_id)
+        joined_rooms.set_joined(room_id, False)
 
     return joined_rooms
 
+# Pre-serialized WebSocket request and REST body templates, only the variable values are JSON encoded for each message
+ws_request_templates = {command: '{"reqId":"%%d","command":"%s","payload":{"stsToken":%%s}}' % command
+                        for command in ('connect', 'authenticate')}
+post_body_template = '{"message":%s}'
+
 # =============================== WebSocket functions ========================================
 
 
-def on_message(_, message):  # Called when message received, parse message into JSON for processing
-    message_json = json.loads(message)
-    logging.debug('Received: %s' % (json.dumps(message_json, sort_keys=True, indent=2, separators=(',', ':'))))
-    process_message(message_json)
+def on_message(_, message):  # Called when message received, decode the fields the chat bot uses for processing
+    message_json = json_codec.decode_event(message)
+    websocket_messages.inc(direction='in', type=message_json.get('event') or 'unknown')
+    if message_log_sampler.sample('received'):
+        logging.debug('Received: %s', LazyJson(message))
+    if message_pipeline is not None: # Process the message with the worker pool, the WebSocket thread does not wait for the reply
+        if message_json.get('event') == 'chatroomPost':
+            message_pipeline.submit(message_json)
+    else:
+        process_message(message_json)
 
 
 def on_error(_, error):  # Called when websocket error has occurred
     logging.error('Error: %s' % (error))
 
 
-def on_close(_,close_status_code, close_msg):  # Called when websocket is closed
-    logging.error('Receive: onclose event. WebSocket Connection Closed')
-    leave_chatroom(access_token, joined_rooms, chatroom_id)
-    # Abort application
-    sys.exit("Abort application")
-
-
-def on_open(_):  # Called when handshake is complete and websocket is open, send login
+def on_open(_):  # Called when handshake is complete and websocket is open (or reopen after reconnect), send login
     logging.info('Receive: onopen event. WebSocket Connection is established')
     send_ws_connect_request(access_token)
 
 
+def shutdown():  # Stop the WebSocket connection, the background threads and the worker processes, then leave all joined Chatrooms
+    token_scheduler.stop()
+    web_socket_app.stop()
+    if message_pipeline is not None:
+        message_pipeline.stop()
+    if outbound_queue is not None:
+        outbound_queue.stop()
+    stop_workers()
+    for room_id in joined_rooms:
+        leave_chatroom(access_token, joined_rooms, room_id)
+
+
+# =============================== Worker processes functions ========================================
+
+
+# Called when a message is received in the worker processes mode, the chatroomPost messages are passed to the worker
+# process of their chatroom without parsing the whole message
+def route_message(_, message):
+    match = room_id_pattern.search(message) if 'chatroomPost' in message else None
+    if match is None:
+        message_json = json_codec.decode_event(message)
+        websocket_messages.inc(direction='in', type=message_json.get('event') or 'unknown')
+        logging.debug('Received: %s', LazyJson(message))
+        return
+    websocket_messages.inc(direction='in', type='chatroomPost')
+    worker_queues[worker_ring.get_node(match.group(1))].put(('message', message))
+
+
+# Start the shared symbology cache and the worker processes, the chatrooms are assigned to the workers with a consistent hash ring
+def start_workers(worker_count):
+    global shared_cache_manager, shared_cache_authkey, worker_ring
+    context = multiprocessing.get_context('spawn')
+    shared_cache_manager, shared_cache_authkey = start_shared_cache(symbology_cache_size, symbology_cache_ttl, symbology_cache_not_found_ttl,
+                                                                    context, quota_settings)
+    worker_ring = HashRing(range(worker_count))
+    worker_queues.extend(context.Queue() for _ in range(worker_count))
+    worker_processes.extend([None] * worker_count)
+    for index in range(worker_count):
+        start_worker(index, context)
+
+
+def start_worker(index, context=None):
+    context = context or multiprocessing.get_context('spawn')
+    worker = context.Process(target=run_worker, name='bot-worker-%d' % index, daemon=True,
+                             args=(index, len(worker_processes), worker_queues[index], access_token, joined_rooms.rooms(),
+                                   shared_cache_manager.address, shared_cache_authkey))
+    worker.start()
+    worker_processes[index] = worker
+    logging.info('Started worker process %d (pid %d)' % (index, worker.pid))
+
+
+# Restart the worker processes that have exited, the same worker number keeps the same chatrooms. The restarted worker gets
+# a new message queue, the queue lock of an exited worker may never be released
+def check_workers():
+    for index, worker in enumerate(worker_processes):
+        if not worker.is_alive():
+            logging.error('Worker process %d exited with code %s, restarting' % (index, worker.exitcode))
+            worker_queues[index] = multiprocessing.get_context('spawn').Queue()
+            start_worker(index)
+
+
+def stop_workers():
+    for worker_queue in worker_queues:
+        worker_queue.put(None)
+    for worker in worker_processes:
+        worker.join(10)
+    if shared_cache_manager is not None:
+        shared_cache_manager.shutdown()
+
+
+'''
+Worker process main function, the process converts and replies to the chatroomPost messages of its worker_queue with its
+own Data API session, message pipeline and outbound queue. The RDP token is sent by the main process after each refresh
+and the symbology cache is the shared cache of the main process.
+'''
+def run_worker(index, worker_count, worker_queue, token, rooms, cache_address, cache_authkey):
+    global access_token, chatroom_id, dapi, outbound_queue, message_pipeline, request_quota
+    configure_logging(log_level)
+    access_token = token
+    for room_id, room_is_managed in rooms:
+        joined_rooms.add(room_id, room_is_managed)
+        joined_rooms.set_joined(room_id, True, room_is_managed)
+    chatroom_id = rooms[0][0] if rooms else None
+
+    # The quotas are shared by all workers, each worker writes its own symbology store file (SQLite has a single writer)
+    request_quota = connect_shared_quota(cache_address, cache_authkey)
+    store_file_root, store_file_ext = os.path.splitext(symbology_store_file)
+    dapi = create_dapi_session(connect_shared_cache(cache_address, cache_authkey),
+                               '%s-worker%d%s' % (store_file_root, index, store_file_ext) if symbology_store_file else '')
+    # The workers share the bot post rate limit
+    outbound_queue = OutboundQueue(post_reply, outbound_batch_window, outbound_max_batch_messages,
+                                   rate=outbound_rate_limit / worker_count, burst=max(1, outbound_burst // worker_count))
+    outbound_queue.start()
+    if pipeline_workers > 0:
+        message_pipeline = MessagePipeline(handle_message, send_reply, pipeline_workers, pipeline_queue_size,
+                                           fair_key=message_sender, weights=fair_sender_weights)
+        message_pipeline.start()
+    if metrics_port: # Each worker serves its metrics on the next ports
+        register_metrics_gauges()
+        MetricsServer(registry, metrics_host, metrics_port + index + 1).start()
+    logging.info('Worker process %d is ready' % index)
+
+    try:
+        while True:
+            item = worker_queue.get()
+            if item is None:
+                break
+            kind, payload = item
+            if kind == 'token':
+                access_token = payload
+            else:
+                on_message(None, payload)
+    except KeyboardInterrupt: # The main process stops the workers
+        pass
+    if message_pipeline is not None:
+        message_pipeline.stop()
+    outbound_queue.stop()
+
+
 # Send a connection request to Messenger ChatBot API WebSocket server
 def send_ws_connect_request(access_token):
 
-    # create connection request message in JSON format
-    connect_request_msg = {
-        'reqId': str(random.randint(0, 1000000)),
-        'command': 'connect',
-        'payload': {
-            'stsToken': access_token
-        }
-    }
+    # create the connect request message from the pre-serialized JSON template
+    request_msg = ws_request_templates['connect'] % (random.randint(0, 1000000), json_codec.dumps(access_token))
     try:
-        web_socket_app.send(json.dumps(connect_request_msg))
+        web_socket_app.send(request_msg)
+        websocket_messages.inc(direction='out', type='connect')
     except Exception as error:
         #print('send_ws_connect_request Exception:', error)
         logging.error('send_ws_connect_request exception: %s' % (error))
 
-    logging.info('Sent: %s' % (json.dumps(connect_request_msg, sort_keys=True, indent=2, separators=(',', ':'))))
+    logging.info('Sent: %s', LazyJson(request_msg))
 
 
 # Function for Refreshing Tokens.  Auth Tokens need to be refreshed within 5 minutes for the WebSocket to persist
 def send_ws_keepalive(access_token):
 
-    # create connection request message in JSON format
-    connect_request_msg = {
-        'reqId': str(random.randint(0, 1000000)),
-        'command': 'authenticate',
-        'payload': {
-            'stsToken': access_token
-        }
-    }
+    # create the authenticate request message from the pre-serialized JSON template
+    request_msg = ws_request_templates['authenticate'] % (random.randint(0, 1000000), json_codec.dumps(access_token))
     try:
-        web_socket_app.send(json.dumps(connect_request_msg))
+        web_socket_app.send(request_msg)
+        websocket_messages.inc(direction='out', type='authenticate')
     except Exception as error:
         #print('send_ws_connect_request Exception :', error)
         logging.error('send_ws_connect_request exception: %s' % (error))
-    
-    logging.info('Sent: %s' % (json.dumps(connect_request_msg, sort_keys=True, indent=2, separators=(',', ':'))))
+
+    logging.info('Sent: %s', LazyJson(request_msg))
+
+
+# Format a single symbol conversion result to a response message
+def format_conversion_result(sender, symbol, target_symbol_type, conversion_result):
+    result, converted_response = conversion_result
+    if result: #Convert success
+        return response_template.substitute(sender = sender, 
+            converted_symbol = converted_response['data'][0][1], # Get converted symbol result
+            symbol = symbol, 
+            target_symbol_type = converted_response['headers'][0][1]['displayName']) 
+    if converted_response is None and data_api_unavailable(): # fast-fail while the circuit breaker is open
+        return response_unavailable_template.substitute(sender = sender, symbol = symbol, target_symbol_type = target_symbol_type)
+    # convert fail or not found a match
+    return add_suggestions(response_error_template.substitute(sender = sender, target_symbol_type = target_symbol_type,  symbol = symbol),
+        symbol)
+
+
+# Return True if the Data API circuit breaker is open (ek.get_data is not called)
+def data_api_unavailable():
+    return dapi.circuit_breaker is not None and dapi.circuit_breaker.is_open()
+
+
+# Append the "did you mean" known symbols of a not found symbol to a response message
+def add_suggestions(response_message, symbol):
+    suggestions = symbol_suggester.suggest(symbol) if symbol_suggester is not None else []
+    if not suggestions:
+        return response_message
+    return response_suggestion_template.substitute(response_message = response_message, suggestions = ', '.join(suggestions))
+
+
+# Format a multiple symbols and/or multiple target symbol types conversion results to one table response message
+def format_conversion_table(sender, target_symbol_types, conversion_results):
+    rows = []
+    for symbol, fields in conversion_results.items():
+        converted_symbols = []
+        for target_symbol_type in target_symbol_types:
+            result, converted_response = fields[symbol_dict[target_symbol_type]]
+            if result:
+                converted_symbols.append(converted_response['data'][0][1])
+            else:
+                converted_symbols.append('temporarily unavailable' if converted_response is None and data_api_unavailable() else 'not available')
+        row = response_table_row_template.substitute(symbol = symbol, converted_symbols = ' | '.join(converted_symbols))
+        rows.append(row if any(converted_symbol != 'not available' for converted_symbol in converted_symbols) else add_suggestions(row, symbol))
+    return response_table_template.substitute(sender = sender, target_symbol_type = ', '.join(target_symbol_types), 
+        converted_table = '\n'.join(rows))
 
 
 def process_message(message_json):  # Process incoming message from a joined Chatroom via the WebSocket connection
+    reply = handle_message(message_json)
+    if reply:
+        try:
+            # Send a message (convert result, or unsupported symbol type) to the chatroom.
+            send_reply(*reply)
+        except Exception as error:
+            logging.error('Post message to a Chatroom fail : %s' % error)
+
+
+# Post a reply message to a chatroom, the message is queued on the outbound queue if it is started
+def send_reply(room_id, response_message):
+    if outbound_queue is not None:
+        outbound_queue.put(room_id, response_message)
+    else:
+        post_message_to_chatroom(access_token, joined_rooms, room_id, response_message)
+
+
+# Send a reply message from a background thread (e.g. the bulk conversion result). The async bot sets background_reply_handler
+# to post the replies on its event loop
+def send_background_reply(room_id, response_message):
+    if background_reply_handler is not None:
+        background_reply_handler(room_id, response_message)
+    else:
+        send_reply(room_id, response_message)
+
+
+# Post a (merged) reply message from the outbound queue, returns the HTTP response. The outbound queue handles the 429 responses
+def post_reply(room_id, text):
+    return post_message_to_chatroom(access_token, joined_rooms, room_id, text, retry_rate_limited=False)
+
+
+# Create a reply for an incoming message, returns a (room_id, response_message) tuple or None if there is nothing to reply
+@message_handle_latency.timed()
+def handle_message(message_json):
 
     message_event = message_json['event']
 
     if message_event == 'chatroomPost':
         try:
             incoming_msg = message_json['post']['message']
-            print('Receive text message: %s' % (incoming_msg))
-            if incoming_msg == '/help': # if users request for help, response with a help message
-                post_message_to_chatroom(access_token, joined_rooms, chatroom_id, help_message)
-            else: # otherwise, check incoming message patter
-                try:
-                    sender = message_json['post']['sender']['email'] # Get message's sender
-
-                    match = re.match(symbology_request_pattern, incoming_msg, flags=re.IGNORECASE) # match incoming message with Regular Expression
-                    response_message = None
-                    if match: # If incoming message match r'Please convert (?P<symbol>.*) to (?P<target_symbol_type>.*)' pattern, it is a symbologyconvert request message.
-                        symbol = match.group('symbol') # get requested symbol
-                        target_symbol_type = match.group('target_symbol_type') # get target_symbol_type 
-                        if target_symbol_type in symbol_dict: # check if user input a supported instrument code type
-                            # convert symbology with Eikon Data API in DAPISessionManagement class
-                            result, converted_response = dapi.convert_symbology(symbol, symbol_dict[target_symbol_type])
-                            if result: #Convert success
-                                response_message = response_template.substitute(sender = sender, 
-                                    converted_symbol = converted_response['data'][0][1], # Get converted symbol result
-                                    symbol = symbol, 
-                                    target_symbol_type = converted_response['headers'][0][1]['displayName']) 
-                            else: # convert fail or not found a match
-                                response_message = response_error_template.substitute(sender = sender, target_symbol_type = target_symbol_type,  symbol = symbol)
-                        else: # if user request for an unsupported instrument code type
-                            response_message = response_unsupported_type_template.substitute(sender = sender, target_symbol_type = target_symbol_type)
-                        
-                    else: # If user input other messages
-                        response_message = response_unsupported_command.substitute(sender = sender)
-                    
-                    # Send a message (convert result, or unsupported symbol type) to the chatroom.
-                    post_message_to_chatroom( access_token, joined_rooms, chatroom_id, response_message)
-
-                except AttributeError as attrib_error:
-                    logging.error('IOError Exception: %s' % attrib_error)
+            logging.debug('Receive text message: %s', incoming_msg)
+            sender = message_json['post']['sender']['email'] # Get message's sender
 
+            response_message = command_router.route(incoming_msg, sender, message_json)
+            if response_message is None: # If user input other messages
+                response_message = response_unsupported_command.substitute(sender = sender)
 
-        except Exception as error:
-            logging.error('Post message to a Chatroom fail : %s' % error)
+            return message_json.get('chatroomId', chatroom_id), response_message
 
+        except Exception as error:
+            logging.error('Process message fail : %s' % error)
+    return None
+
+
+# '/help' command handler, response with a help message
+def help_command(message_json, sender, match):
+    return help_message
+
+
+# Return the sender of a chatroomPost message, the fair scheduling key of the message pipeline
+def message_sender(message_json):
+    return ((message_json.get('post') or {}).get('sender') or {}).get('email')
+
+
+# Format the usage dictionary of RequestQuota.usage() for the /stats reply
+def format_quota_usage(usage):
+    text = '%d instrument codes converted, %d requests throttled' % (usage['conversions'], usage['throttled'])
+    if usage['rate'] <= 0:
+        return text + ', unlimited quota'
+    return text + ', %d of %d available (%g per minute)' % (int(usage['available']), usage['burst'], usage['rate'] * 60)
+
+
+# '/stats' command handler, response with the conversion usage and quota of the sender and the chatroom
+def stats_command(message_json, sender, match):
+    pending = sum(message_pipeline.stats()['worker_queue_depths']) if message_pipeline is not None else 0
+    return response_stats_template.substitute(sender = sender,
+        sender_usage = format_quota_usage(request_quota.usage('sender', sender)),
+        room_usage = format_quota_usage(request_quota.usage('room', message_json.get('chatroomId', chatroom_id))),
+        pending = pending)
+
+
+# Parse the <target symbol type> list, returns the normalized target symbol types and the unsupported input types
+def parse_target_symbol_types(text):
+    requested_symbol_types = [target for target in symbol_list_separator_pattern.split(text) if target] # get target_symbol_types 
+    if [target.upper() for target in requested_symbol_types] == [all_symbol_types]:
+        requested_symbol_types = list(symbol_dict)
+
+    # Normalize the requested target symbol types with the case-insensitive alias index
+    target_symbol_types = [symbol_type_aliases.get(target.lower()) for target in requested_symbol_types]
+    unsupported_symbol_types = [target for target, symbol_type in zip(requested_symbol_types, target_symbol_types) if symbol_type is None]
+    return target_symbol_types, unsupported_symbol_types
+
+
+# 'Please convert <symbol> to <target symbol type>' command handler
+def convert_command(message_json, sender, match):
+    symbols = [symbol for symbol in symbol_list_separator_pattern.split(match.group('symbol')) if symbol] # get requested symbols
+    target_symbol_types, unsupported_symbol_types = parse_target_symbol_types(match.group('target_symbol_type'))
+    if not symbols: # 'Please convert' without any symbol
+        return response_unsupported_command.substitute(sender = sender)
+    if not target_symbol_types or unsupported_symbol_types: # if user request for an unsupported instrument code type
+        return response_unsupported_type_template.substitute(sender = sender, 
+            target_symbol_type = ', '.join(unsupported_symbol_types) or match.group('target_symbol_type'))
+
+    # Each (symbol, target symbol type) conversion takes one token of the sender and chatroom quotas
+    exceeded = request_quota.consume(sender, message_json.get('chatroomId', chatroom_id), len(symbols) * len(target_symbol_types))
+    if exceeded:
+        scope, wait = exceeded
+        conversion_throttled.inc(scope=scope)
+        if wait is None: # The request costs more than the burst
+            return response_too_large_template.substitute(sender = sender, scope = 'your' if scope == 'sender' else 'the chatroom',
+                burst = quota_sender_burst if scope == 'sender' else quota_room_burst)
+        template, rate = ((response_throttled_sender_template, quota_sender_per_minute) if scope == 'sender'
+                          else (response_throttled_room_template, quota_room_per_minute))
+        return template.substitute(sender = sender, rate = '%g' % rate, wait = int(math.ceil(wait)))
+
+    # convert symbology with Eikon Data API in DAPISessionManagement class
+    if len(symbols) == 1 and len(target_symbol_types) == 1:
+        return format_conversion_result(sender, symbols[0], target_symbol_types[0], 
+            dapi.convert_symbology(symbols[0], symbol_dict[target_symbol_types[0]]))
+    # Convert all symbols and fields with batched ek.get_data calls, then response with one table message
+    return format_conversion_table(sender, target_symbol_types,
+        dapi.convert_symbology(symbols, [symbol_dict[target] for target in target_symbol_types]))
+
+
+# 'Please bulk convert <file name> to <target symbol type>' command handler, the file is converted on a background thread
+def bulk_convert_command(message_json, sender, match):
+    file_name = match.group('file_name')
+    target_symbol_types, unsupported_symbol_types = parse_target_symbol_types(match.group('target_symbol_type'))
+    if not target_symbol_types or unsupported_symbol_types:
+        return response_unsupported_type_template.substitute(sender = sender, 
+            target_symbol_type = ', '.join(unsupported_symbol_types) or match.group('target_symbol_type'))
+
+    # Only the files of the bulk_convert_dir folder are accepted
+    input_file = os.path.join(bulk_convert_dir, file_name)
+    if os.path.basename(file_name) != file_name or not os.path.isfile(input_file):
+        return response_bulk_error_template.substitute(sender = sender, file_name = file_name, error = 'file not found')
+    output_file_name = '%s_converted.csv' % os.path.splitext(file_name)[0]
+    with bulk_convert_lock:
+        if file_name in bulk_convert_running:
+            return response_bulk_error_template.substitute(sender = sender, file_name = file_name, error = 'the file is being converted')
+        bulk_convert_running.add(file_name)
+
+    room_id = message_json.get('chatroomId', chatroom_id)
+    # Each chunk takes the sender and chatroom quota tokens of its conversions, the conversion waits while the quota is exceeded
+    converter = BulkConverter(dapi, [symbol_dict[target] for target in target_symbol_types], target_symbol_types,
+                              bulk_convert_chunk_size, bulk_convert_concurrency,
+                              acquire=lambda cost: request_quota.acquire(sender, room_id, cost))
+
+    def run():
+        try:
+            stats = converter.convert_file(input_file, os.path.join(bulk_convert_dir, output_file_name))
+            send_background_reply(room_id, response_bulk_done_template.substitute(sender = sender, output_file_name = output_file_name,
+                rows = stats['resumed_rows'] + stats['rows'], converted = stats['converted'], not_found = stats['not_found'],
+                elapsed = '%.1f' % stats['elapsed_s']))
+        except Exception as error:
+            logging.error('Bulk conversion of %s failure: %s' % (file_name, error))
+            send_background_reply(room_id, response_bulk_error_template.substitute(sender = sender, file_name = file_name, error = error))
+        finally:
+            with bulk_convert_lock:
+                bulk_convert_running.discard(file_name)
+
+    threading.Thread(target=run, name='bulk-convert-%s' % file_name, daemon=True).start()
+    return response_bulk_started_template.substitute(sender = sender, file_name = file_name,
+        target_symbol_type = ', '.join(target_symbol_types), output_file_name = output_file_name)
+
+
+# Command dispatcher, the command patterns are compiled once here. Register new commands and their handlers below.
+command_router = CommandRouter()
+command_router.register_exact('/help', help_command)
+command_router.register_exact('/stats', stats_command)
+command_router.register_pattern('please convert ', symbology_request_pattern, convert_command)
+if bulk_convert_dir:
+    command_router.register_pattern('please bulk convert ', bulk_convert_request_pattern, bulk_convert_command)
+
+
+# Return the requested symbols of the conversion requests of the joined chatrooms history, a symbol is repeated for each request
+def load_chat_history_symbols():
+    request_pattern = re.compile(symbology_request_pattern, flags=re.IGNORECASE)
+    symbols = []
+    for room_id, room_is_managed in joined_rooms.rooms():
+        for post in list_chatroom_posts(access_token, room_id, room_is_managed, prewarm_history_posts):
+            match = request_pattern.match((post.get('message') or '').strip())
+            if match:
+                symbols.extend(symbol for symbol in symbol_list_separator_pattern.split(match.group('symbol')) if symbol)
+    return symbols
+
+
+# Start prewarming the symbology cache of prewarm_dapi (a DAPISessionManagement object) with the watchlist file and chat history symbols
+def start_cache_prewarm(prewarm_dapi):
+    target_symbol_types, unsupported_symbol_types = parse_target_symbol_types(prewarm_symbol_types)
+    if not target_symbol_types or unsupported_symbol_types:
+        logging.error('Cache prewarm: unsupported PREWARM_SYMBOL_TYPES %s' % prewarm_symbol_types)
+        return None
+    prewarmer = CachePrewarmer(prewarm_dapi, [symbol_dict[target] for target in target_symbol_types], prewarm_batch_size, prewarm_max_symbols)
+    prewarmer.start(load_watchlist=(lambda: read_watchlist(prewarm_watchlist_file)) if prewarm_watchlist_file else None,
+                    load_history=load_chat_history_symbols if prewarm_chat_history else None)
+    return prewarmer
+
+
+# Register the queue depths and connection state gauges, their values are read when the metrics endpoint is scraped
+def register_metrics_gauges():
+    def queue_depths():
+        depths = {}
+        if outbound_queue is not None:
+            depths[('outbound',)] = outbound_queue.stats()['pending']
+        for index, worker_queue in enumerate(worker_queues):
+            depths[('worker_%d' % index,)] = worker_queue.qsize()
+        if message_pipeline is not None:
+            pipeline_stats = message_pipeline.stats()
+            depths[('pipeline_workers',)] = sum(pipeline_stats['worker_queue_depths'])
+            depths[('pipeline_outbound',)] = pipeline_stats['outbound_queue_depth']
+        return depths
+
+    registry.gauge('queue_depth', 'Number of messages waiting in the bot queues', queue_depths, ['queue'])
+    registry.gauge('symbology_requests_in_flight', 'Number of (symbol, field) conversions waiting for ek.get_data',
+                   lambda: dapi.coalescer.stats()['in_flight'])
+    if dapi.symbology_cache is not None:
+        registry.gauge('symbology_cache_entries', 'Number of cached symbology conversion results', lambda: dapi.symbology_cache.stats()['size'])
+    if dapi.circuit_breaker is not None:
+        registry.gauge('data_api_circuit_open', '1 if the Data API circuit breaker is open or half-open', lambda: int(dapi.circuit_breaker.is_open()))
+    registry.gauge('websocket_connected', '1 if the WebSocket connection is open',
+                   lambda: int(web_socket_app is not None and web_socket_app.stats()['connected']))
+    if token_scheduler is not None:
+        registry.gauge('rdp_token_expires_in_seconds', 'Seconds before the current RDP access token expires', lambda: token_scheduler.expires_in())
+
+
+# Create DAPISessionManagement object with the symbology cache, store, reference index, symbol suggester, circuit breaker and backend settings,
+# the worker processes pass the shared symbology cache and their own store file
+def create_dapi_session(symbology_cache=None, store_file=None):
+    if symbology_cache is None:
+        symbology_cache = SymbologyCache(symbology_cache_size, symbology_cache_ttl, symbology_cache_not_found_ttl)
+    if store_file is None:
+        store_file = symbology_store_file
+    symbology_store = None
+    if store_file:
+        symbology_store = SymbologyStore(store_file, symbology_store_max_age)
+        symbology_store.start()
+        # Write the pending conversion results before the application exits
+        atexit.register(symbology_store.close)
+    reference_index = None
+    if reference_index_file:
+        reference_index = ReferenceIndex(reference_index_file)
+        logging.info('Loaded %d instruments from reference index %s' % (len(reference_index), reference_index_file))
+    circuit_breaker = None
+    if data_api_failure_threshold > 0:
+        circuit_breaker = CircuitBreaker(data_api_failure_threshold, data_api_reset_timeout, data_api_slow_call_threshold, name='data_api')
+    return DAPISessionManagement(data_api_appkey, symbology_cache, symbology_store, dapi_chunk_size, reference_index,
+                                 symbol_suggester, symbol_prevalidate, circuit_breaker, create_symbology_backend())
+
+
+# Create the SymbologyBackend object of the SYMBOLOGY_BACKEND setting
+def create_symbology_backend():
+    return create_backend(symbology_backend, data_api_appkey, symbology_fixture_file, symbology_fixture_latency)
+
+
+usage = '''Usage: python chatbot_demo_symbology.py [options]
+    -w, --workers=<n>   number of worker processes (default BOT_WORKERS or 1), the chatrooms are shared among the workers
+'''
 
 # =============================== Main Process ========================================
 # Running the demo
 if __name__ == '__main__':
 
     # Setting Python Logging
-    logging.basicConfig(format='%(asctime)s: %(levelname)s:%(name)s :%(message)s', level=log_level, datefmt='%Y-%m-%d %H:%M:%S')
+    configure_logging(log_level)
+
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'hw:', ['help', 'workers='])
+    except getopt.GetoptError as error:
+        print(error)
+        print(usage)
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(usage)
+            sys.exit(0)
+        elif opt in ('-w', '--workers'):
+            bot_workers = int(arg)
 
     print('Setting Eikon Data API App Key')
-    # Create and initiate DAPISessionManagement object
-    dapi = DAPISessionManagement(data_api_appkey)
+    # Create and initiate DAPISessionManagement object, the worker processes create their own sessions
+    dapi = create_dapi_session() if bot_workers <= 1 else DAPISessionManagement(data_api_appkey, backend=create_symbology_backend())
     if not dapi.verify_desktop_connection(): #if init session with Refinitiv Workspace/Eikon Desktop success
         print('Please start Refinitiv Workspace in your local machine')
         # Abort application
@@ -369,74 +979,97 @@ if __name__ == '__main__':
     print('Getting RDP Authentication Token')
 
     # Create and initiate RDPTokenManagement object
-    rdp_token = RDPTokenManagement(bot_username, bot_password, app_key, 30)
+    rdp_token = RDPTokenManagement(bot_username, bot_password, app_key, 30, http_session)
 
     # Authenticate with RDP Token service
-    access_token, refresh_token, expire_time, logged_in = authen_rdp(rdp_token)
-    # if not auth_token:
-    if not access_token:
+    token_scheduler = authen_rdp(rdp_token)
+    if not token_scheduler:
         # Abort application
         sys.exit(1)
+    access_token = token_scheduler.access_token
 
     print('Successfully Authenticated ')
 
-    # List associated Chatrooms
-    print('Get Rooms ')
-    status, chatroom_respone = list_chatrooms(access_token)
-
-    if not chatroom_respone:
+    # List and join all associated Chatrooms and managed Chatrooms
+    print('Get and Join Rooms ')
+    if not join_all_chatrooms(access_token):
         # Abort application
         sys.exit(1)
 
-    chatroom_id = chatroom_respone['chatrooms'][0]['chatroomId']
-    # print('Chatroom ID is ', chatroom_id)
+    chatroom_id = next(iter(joined_rooms))
+    print('Joined %d Chatrooms' % len(joined_rooms))
 
-    # Join associated Chatroom
-    print('Join Rooms ')
-    joined_rooms = join_chatroom(access_token, chatroom_id)
-    # print('joined_rooms is ', joined_rooms)
-
-    if not joined_rooms:
-        # Abort application
-        sys.exit(1)
+    if bot_workers > 1: # The worker processes convert and reply, this process only routes the messages
+        start_workers(bot_workers)
+        print('Started %d worker processes' % bot_workers)
+    else:
+        outbound_queue = OutboundQueue(post_reply, outbound_batch_window, outbound_max_batch_messages,
+                                       rate=outbound_rate_limit, burst=outbound_burst)
+        outbound_queue.start()
+
+        if pipeline_workers > 0:
+            message_pipeline = MessagePipeline(handle_message, send_reply, pipeline_workers, pipeline_queue_size,
+                                               fair_key=message_sender, weights=fair_sender_weights)
+            message_pipeline.start()
+
+    # Prewarm the symbology cache on a background thread while the WebSocket connection is opened, the worker processes
+    # share the prewarmed cache
+    if prewarm_watchlist_file or prewarm_chat_history:
+        prewarm_dapi = dapi
+        if worker_processes:
+            prewarm_dapi = DAPISessionManagement(data_api_appkey, connect_shared_cache(shared_cache_manager.address, shared_cache_authkey),
+                                                 chunk_size=dapi_chunk_size, backend=create_symbology_backend())
+        cache_prewarmer = start_cache_prewarm(prewarm_dapi)
+
+    if metrics_port:
+        register_metrics_gauges()
+        metrics_server = MetricsServer(registry, metrics_host, metrics_port)
+        metrics_server.start()
+        print('Serving metrics on http://%s:%d/metrics' % (metrics_host, metrics_server.port))
 
     # Send Greeting message
-    post_message_to_chatroom( access_token, joined_rooms, chatroom_id, 'Hi, I am a chatbot symbology converter.\n\n' + help_message)
-    # Connect to a Chatroom via a WebSocket connection
+    for room_id in joined_rooms:
+        post_message_to_chatroom( access_token, joined_rooms, room_id, 'Hi, I am a chatbot symbology converter.\n\n' + help_message)
+    # Connect to a Chatroom via a WebSocket connection, the connection is reopened automatically if it is closed
     print('Connecting to WebSocket %s ... ' % (ws_url))
     #websocket.enableTrace(True)
-    web_socket_app = websocket.WebSocketApp(
+    web_socket_app = WebSocketSupervisor(
         ws_url,
-        on_message=on_message,
+        on_message=route_message if worker_processes else on_message,
+        on_open=on_open,
         on_error=on_error,
-        on_close=on_close,
-        subprotocols=['messenger-json'])
-
-    web_socket_app.on_open = on_open
+        subprotocols=['messenger-json'],
+        sslopt={'check_hostname': False},
+        reconnect_delay=ws_reconnect_delay,
+        max_reconnect_delay=ws_max_reconnect_delay)
     # Event loop
-    wst = threading.Thread(
-        target=web_socket_app.run_forever,
-        kwargs={'sslopt': {'check_hostname': False}})
-    wst.start()
+    web_socket_app.start()
+
+    # Refresh the token on the background scheduler thread, it sends the 'authenticate' request after each refresh
+    token_scheduler.add_refresh_callback(on_token_refresh)
+    token_scheduler.start()
 
     try:
-        while True:
-            # Give 60 seconds to obtain the new security token and send reissue
-            #logging.debug('expire_time = %s' %(expire_time))
-            if int(expire_time) > 60: 
-                time.sleep(int(expire_time) - 60) 
-            else:
-                # Fail the refresh since value too small
-                # Abort application
-                sys.exit(1)
-
-            print('Refresh Token ')
-            access_token, refresh_token, expire_time, logged_in = authen_rdp(rdp_token)
-            if not access_token:
-                # Abort application
-                sys.exit(1)
-            # Update authentication token to the WebSocket connection.
-            if logged_in:
-                send_ws_keepalive(access_token)
+        next_stats_tm = time.monotonic() + stats_log_interval
+        while web_socket_app.is_running():
+            web_socket_app.join(worker_check_interval if worker_processes else stats_log_interval)
+            if worker_processes:
+                check_workers()
+            if time.monotonic() < next_stats_tm:
+                continue
+            next_stats_tm = time.monotonic() + stats_log_interval
+            logging.info('WebSocket connection: %s', web_socket_app.stats())
+            if message_pipeline is not None:
+                logging.info('Message Pipeline: %s', message_pipeline.stats())
+            if outbound_queue is not None:
+                logging.info('Outbound Queue: %s', outbound_queue.stats())
+            if not worker_processes: # The worker processes convert the messages with their own Data API sessions
+                logging.info('Data API request coalescing: %s', dapi.coalescer.stats())
+            if dapi.circuit_breaker is not None:
+                logging.info('Data API circuit breaker: %s', dapi.circuit_breaker.stats())
+            if cache_prewarmer is not None:
+                logging.info('Cache prewarm: %s', cache_prewarmer.stats())
+            if worker_processes:
+                logging.info('Worker queues: %s', [worker_queue.qsize() for worker_queue in worker_queues])
     except KeyboardInterrupt:
-        web_socket_app.close()
+        shutdown()
@@ -0,0 +1,66 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |            Registry of the chatrooms served by the chat bot               --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for thread operations
+import threading
+import time
+
+
+class ChatroomRegistry:
+
+    '''
+    Keep the state of every chatroom (managed or not, joined or not, join time) in a dictionary keyed by chatroom ID.
+    The 'room_id in registry' check and len(registry) only count the joined chatrooms, so the registry can
+    be used where the application used a joined rooms list.
+    '''
+
+    # Constructor function
+    def __init__(self):
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    # Register a chatroom, the room is not joined yet
+    def add(self, room_id, room_is_managed=False, name=None):
+        with self._lock:
+            room = self._rooms.setdefault(room_id, {'managed': room_is_managed, 'joined': False, 'joined_tm': None})
+            room['managed'] = room_is_managed
+            if name is not None:
+                room['name'] = name
+            return room
+
+    # Update the joined state of a chatroom
+    def set_joined(self, room_id, joined=True, room_is_managed=None):
+        with self._lock:
+            room = self._rooms.setdefault(room_id, {'managed': bool(room_is_managed), 'joined': False, 'joined_tm': None})
+            if room_is_managed is not None:
+                room['managed'] = room_is_managed
+            room['joined'] = joined
+            room['joined_tm'] = time.time() if joined else None
+
+    # Return True if the chatroom is a managed chatroom
+    def is_managed(self, room_id):
+        room = self._rooms.get(room_id)
+        return room is not None and room['managed']
+
+    # Return list of (room_id, room_is_managed) tuples of the registered or joined chatrooms
+    def rooms(self, joined_only=True):
+        with self._lock:
+            return [(room_id, room['managed']) for room_id, room in self._rooms.items() if room['joined'] or not joined_only]
+
+    def __contains__(self, room_id):
+        room = self._rooms.get(room_id)
+        return room is not None and room['joined']
+
+    def __len__(self):
+        return len(self.rooms())
+
+    def __iter__(self):
+        return iter([room_id for room_id, _ in self.rooms()])
@@ -0,0 +1,134 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |      Circuit breaker for the upstream Eikon Data API calls                --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for thread and time operations
+import threading
+import time
+import logging
+
+closed = 'closed'
+open_state = 'open'
+half_open = 'half_open'
+
+
+class CircuitBreaker:
+
+    '''
+    Stop calling an unavailable upstream service and fail fast instead of waiting for its timeout.
+        - closed: the calls go through, failure_threshold consecutive failures (errors or calls slower than
+          slow_call_threshold seconds) open the circuit.
+        - open: allow_request() returns False until reset_timeout seconds have passed.
+        - half_open: the first caller after reset_timeout runs the probe function (e.g. verify_desktop_connection).
+          If the probe succeeds, the caller sends one trial call, its success closes the circuit and its failure opens it again.
+          The other callers fail fast while the trial call runs.
+
+        if breaker.allow_request():
+            try:
+                ... call the service
+                breaker.record_success(elapsed seconds)
+            except Exception:
+                breaker.record_failure()
+    '''
+
+    # Circuit breaker parameters
+    failure_threshold = 5  # consecutive failures that open the circuit
+    reset_timeout = 30  # seconds before a half-open probe
+    slow_call_threshold = 0  # seconds, a successful call slower than this counts as a failure (0 to disable)
+
+    # Constructor function
+    def __init__(self, failure_threshold=5, reset_timeout=30, slow_call_threshold=0, probe=None, name='upstream'):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.probe = probe
+        self.name = name
+        self._state = closed
+        self._failures = 0
+        self._opened_tm = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+        # statistics
+        self._open_count = 0
+        self._rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def is_open(self):
+        return self.state != closed
+
+    # Return True if the call can be sent, False if the caller must fail fast
+    def allow_request(self):
+        with self._lock:
+            if self._state == closed:
+                return True
+            if self._state == open_state and time.monotonic() - self._opened_tm >= self.reset_timeout:
+                self._state = half_open
+                self._trial_running = True
+            elif self._state == open_state or self._trial_running:
+                self._rejected += 1
+                return False
+            else:
+                self._trial_running = True
+
+        # This thread owns the half-open trial
+        if self.probe is not None:
+            try:
+                probe_result = self.probe()
+            except Exception as error:
+                logging.error('Circuit breaker %s: probe failure: %s' % (self.name, error))
+                probe_result = False
+            if not probe_result:
+                self._open('probe failed')
+                with self._lock:
+                    self._rejected += 1
+                return False
+        logging.info('Circuit breaker %s: half-open, sending a trial call' % self.name)
+        return True
+
+    def record_success(self, elapsed=0):
+        if self.slow_call_threshold and elapsed > self.slow_call_threshold:
+            self.record_failure('slow call %.1f seconds' % elapsed)
+            return
+        with self._lock:
+            self._failures = 0
+            if self._state == closed:
+                return
+            self._state = closed
+            self._trial_running = False
+        logging.info('Circuit breaker %s: closed' % self.name)
+
+    def record_failure(self, reason='error'):
+        with self._lock:
+            self._failures += 1
+            should_open = self._state == half_open or (self._state == closed and self._failures >= self.failure_threshold)
+        if should_open:
+            self._open(reason)
+
+    def _open(self, reason):
+        with self._lock:
+            self._state = open_state
+            self._opened_tm = time.monotonic()
+            self._trial_running = False
+            self._open_count += 1
+        logging.warning('Circuit breaker %s: open for %s seconds (%s)' % (self.name, self.reset_timeout, reason))
+
+    # Return circuit breaker statistics for logging/monitoring purpose
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'opened': self._open_count,
+                'rejected': self._rejected
+            }
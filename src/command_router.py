@@ -0,0 +1,61 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |      Table-driven command dispatcher for the incoming chat messages       --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for Regular Expression operations
+import re
+
+
+class CommandRouter:
+
+    '''
+    Dispatch an incoming chat message to the registered command handler.
+        - register_exact('/help', handler): the message equals the command text (case-insensitive)
+        - register_pattern('please convert', r'...', handler): the message starts with the prefix (case-insensitive)
+          and matches the precompiled Regular Expression pattern
+    The handler is called as handler(message_json, sender, match) and returns the response message.
+    The prefix check rejects the other messages without any Regular Expression work.
+    '''
+
+    # Constructor function
+    def __init__(self):
+        self._exact_commands = {}
+        self._pattern_commands = []  # list of (prefix, compiled pattern, handler)
+
+    # Register a command that matches the whole message
+    def register_exact(self, command, handler):
+        self._exact_commands[command.lower()] = handler
+
+    # Register a command that matches a Regular Expression pattern. The pattern is compiled once with re.IGNORECASE
+    def register_pattern(self, prefix, pattern, handler):
+        self._pattern_commands.append((prefix.lower(), re.compile(pattern, flags=re.IGNORECASE), handler))
+
+    # Return the list of the registered command names
+    def commands(self):
+        return list(self._exact_commands) + [prefix for prefix, _, _ in self._pattern_commands]
+
+    '''
+    Find the command handler of the incoming message and call it. Returns the handler response message,
+    or None if the message is not a supported command.
+    '''
+    def route(self, incoming_msg, sender, message_json=None):
+        text = incoming_msg.strip()
+        lowered = text.lower()
+
+        handler = self._exact_commands.get(lowered)
+        if handler is not None:
+            return handler(message_json, sender, None)
+
+        for prefix, pattern, handler in self._pattern_commands:
+            if lowered.startswith(prefix):
+                match = pattern.match(text)
+                if match:
+                    return handler(message_json, sender, match)
+        return None
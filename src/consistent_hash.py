@@ -0,0 +1,59 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |     Consistent hash ring for assigning chatrooms to bot worker processes  --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for hashing operations
+import bisect
+import hashlib
+
+
+# Return a 64 bits integer hash of a text
+def _hash(text):
+    return int.from_bytes(hashlib.md5(text.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+
+    '''
+    Consistent hash ring, each node (e.g. a worker number) is placed replicas times on the ring and a key (e.g. a chatroom ID)
+    belongs to the first node clockwise of the key hash. Adding or removing a node only moves the keys of that node.
+    '''
+
+    replicas = 100  # virtual nodes per node
+
+    # Constructor function
+    def __init__(self, nodes=(), replicas=100):
+        self.replicas = replicas
+        self._hashes = []
+        self._nodes = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            point = _hash('%s#%d' % (node, replica))
+            index = bisect.bisect(self._hashes, point)
+            self._hashes.insert(index, point)
+            self._nodes.insert(index, node)
+
+    def remove(self, node):
+        points = [(point, ring_node) for point, ring_node in zip(self._hashes, self._nodes) if ring_node != node]
+        self._hashes = [point for point, _ in points]
+        self._nodes = [ring_node for _, ring_node in points]
+
+    # Return the node of a key, or None if the ring is empty
+    def get_node(self, key):
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._nodes[index]
+
+    def __len__(self):
+        return len(set(self._nodes))
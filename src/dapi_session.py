@@ -9,19 +9,71 @@
 # |         Refinitiv Eikon API demo app/module to get symbology              --
 # |-----------------------------------------------------------------------------
 
-# Import the required libraries for Eikon and JSON operations
-import eikon as ek
+# Import the required libraries for thread and time operations
 import logging
-import json
+import time
+import threading
+from collections import OrderedDict
+
+from symbology_cache import normalize_symbol
+from request_coalescer import RequestCoalescer
+from metrics import registry
+from symbology_backend import EikonBackend
+
+# Data API metrics
+get_data_latency = registry.histogram('symbology_get_data_seconds', 'Latency of the ek.get_data calls', ['fields'])
+get_data_exceptions = registry.counter('symbology_get_data_exceptions_total', 'Number of the failed ek.get_data calls', ['fields'])
+conversion_results = registry.counter('symbology_conversions_total', 'Symbology conversion results by target field, result and source',
+                                      ['field', 'result', 'source'])
+
+
+# Return the result label of a (converted_result, response) tuple for the metrics
+def _result_label(conversion_result):
+    converted_result, response = conversion_result
+    if converted_result:
+        return 'success'
+    return 'not_found' if response is not None else 'error'
 
 class DAPISessionManagement:
     
     dapi_app_key = ''
+    symbology_cache = None
+    symbology_store = None
+    reference_index = None
+    symbol_suggester = None
+    prevalidate = False
+    prevalidate_ttl = 86400 # seconds a 'not found' symbol confirmed by the backend is answered without ek.get_data
+    circuit_breaker = None
+    backend = None
+    chunk_size = 100 # maximum number of instruments in each ek.get_data call
 
-    # Constructor function
-    def __init__(self, app_key):
+    # Constructor function, pass a SymbologyCache object to cache the conversion results,
+    # a SymbologyStore object to keep the conversion results across application restarts
+    # and a ReferenceIndex object to convert the indexed instruments without ek.get_data calls.
+    # The successfully converted symbols are added to the symbol_suggester (a SymbolSuggester object), with prevalidate=True
+    # a symbol that the backend returned as not found (within prevalidate_ttl seconds) and that is close to a known symbol
+    # is answered as not found without an ek.get_data call. The symbols that are not confirmed are always requested.
+    # While the circuit_breaker (a CircuitBreaker object) is open, ek.get_data is not called and the stale cached or stored
+    # results are returned instead, its half-open probe is verify_desktop_connection if the breaker does not have a probe.
+    # The data is requested from the backend (a SymbologyBackend object), the default backend is the Eikon Data API with app_key
+    def __init__(self, app_key, symbology_cache=None, symbology_store=None, chunk_size=100, reference_index=None,
+                 symbol_suggester=None, prevalidate=False, circuit_breaker=None, backend=None):
         self.dapi_app_key = app_key
-        ek.set_app_key(self.dapi_app_key)
+        self.symbology_cache = symbology_cache
+        self.symbology_store = symbology_store
+        self.reference_index = reference_index
+        self.symbol_suggester = symbol_suggester
+        self.prevalidate = prevalidate
+        self._not_found_symbols = OrderedDict() # normalized symbol and the time the backend returned it as not found
+        self._not_found_lock = threading.Lock()
+        self.circuit_breaker = circuit_breaker
+        if circuit_breaker is not None and circuit_breaker.probe is None:
+            circuit_breaker.probe = self.verify_desktop_connection
+        self.chunk_size = chunk_size
+        # Merge concurrent identical (symbol, field) requests into one ek.get_data call
+        self.coalescer = RequestCoalescer()
+        # The eikon module is imported on the first Eikon Data API request
+        self.backend = backend if backend is not None else EikonBackend(app_key)
     
     '''
     convert symbol to targe instrument code type with ek.get_data function. The supported fields are 
@@ -31,22 +83,231 @@ class DAPISessionManagement:
         - TR.CUSIP
         - TR.LipperRICCode
         - TR.OrganizationID
+    The result is served from the symbology_cache, reference_index and symbology_store (if set) before calling ek.get_data function.
+    If ek.get_data fails or the circuit_breaker is open, the stale cached or stored results are returned, or (False, None).
+
+    The symbol and target_symbol_type can be a single value or a list:
+        - single symbol, single target_symbol_type: returns a (converted_result, response) tuple
+        - list of symbols, single target_symbol_type: returns a dictionary of symbol and (converted_result, response) tuple
+        - single symbol, list of target_symbol_type: returns a dictionary of target_symbol_type and (converted_result, response) tuple
+        - list of symbols, list of target_symbol_type: returns a dictionary of symbol and the above target_symbol_type dictionary
+    The dictionaries keep the requested order. All fields of the symbols that are not cached are requested with 
+    one ek.get_data call per chunk_size symbols, each response is split into one single field response per symbol.
     '''
     def convert_symbology(self, symbol, target_symbol_type = 'TR.ISIN'):
-        converted_result = True
+        symbols = [symbol] if isinstance(symbol, str) else symbol
+        target_symbol_types = [target_symbol_type] if isinstance(target_symbol_type, str) else target_symbol_type
+        results = self._convert_symbols(symbols, target_symbol_types)
+
+        if isinstance(target_symbol_type, str):
+            results = {symbol: fields[target_symbol_type] for symbol, fields in results.items()}
+        if isinstance(symbol, str):
+            return results[symbol]
+        return results
+
+    def _convert_symbols(self, symbols, target_symbol_types):
+        results = {}
+        missing_keys = {} # (normalized symbol, target_symbol_type) key and its (symbol, target_symbol_type) request
+        for symbol in symbols:
+            if symbol in results:
+                continue
+            results[symbol] = {}
+            for target_symbol_type in target_symbol_types:
+                cached = self._lookup_local(symbol, target_symbol_type)
+                if cached is None and self._is_mistyped(symbol):
+                    conversion_results.inc(field=target_symbol_type, result='not_found', source='prevalidation')
+                    cached = (False, None)
+                results[symbol][target_symbol_type] = cached
+                if cached is None:
+                    missing_keys.setdefault((normalize_symbol(symbol), target_symbol_type), []).append((symbol, target_symbol_type))
+        if not missing_keys:
+            self._add_known_symbols(results)
+            return results
+
+        # The keys that are already requested by other threads are not requested again, wait for their results instead
+        owned_keys, waiting_flights = self.coalescer.join(list(missing_keys))
         try:
-            response = ek.get_data(symbol,target_symbol_type, raw_output = True)
-            if 'error' in response or not response['data'][0][1]: # The get_data can returns both 'error' and just empty/null result 
-                converted_result = False
+            missing_requests = {} # missing target_symbol_types tuple and its symbols
+            missing_fields = {}
+            for key in owned_keys:
+                for symbol, target_symbol_type in missing_keys[key][:1]:
+                    missing_fields.setdefault(symbol, []).append(target_symbol_type)
+            for symbol, fields in missing_fields.items():
+                missing_requests.setdefault(tuple(fields), []).append(symbol)
+
+            for fields, missing_symbols in missing_requests.items():
+                for index in range(0, len(missing_symbols), self.chunk_size):
+                    for symbol, converted_fields in self._request_data(missing_symbols[index:index + self.chunk_size], list(fields)).items():
+                        for target_symbol_type, conversion_result in converted_fields.items():
+                            key = (normalize_symbol(symbol), target_symbol_type)
+                            self._set_results(results, missing_keys[key], conversion_result)
+                            self.coalescer.complete(key, conversion_result)
+        finally:
+            self.coalescer.release(owned_keys, (False, None))
+
+        for key, flight in waiting_flights.items():
+            conversion_result = flight.wait()
+            conversion_results.inc(field=key[1], result=_result_label(conversion_result), source='coalesced')
+            self._set_results(results, missing_keys[key], conversion_result)
+        self._add_known_symbols(results)
+        return results
+
+    # Return True if prevalidation is enabled and the backend already returned the symbol as not found, and the symbol
+    # is close to a known symbol (e.g. IBM.NN). A valid symbol that is not requested yet (e.g. VOD.N after VOD.L) is not mistyped
+    def _is_mistyped(self, symbol):
+        if not self.prevalidate or self.symbol_suggester is None or symbol in self.symbol_suggester:
+            return False
+        key = normalize_symbol(symbol)
+        with self._not_found_lock:
+            confirmed_tm = self._not_found_symbols.get(key)
+            if confirmed_tm is None:
+                return False
+            if confirmed_tm + self.prevalidate_ttl <= time.monotonic(): # Request the symbol again
+                del self._not_found_symbols[key]
+                return False
+        return bool(self.symbol_suggester.suggest(symbol))
+
+    # Add the symbols with at least one successful conversion to the symbol_suggester
+    def _add_known_symbols(self, results):
+        if self.symbol_suggester is None:
+            return
+        for symbol, fields in results.items():
+            if any(conversion_result[0] for conversion_result in fields.values()):
+                self.symbol_suggester.add(symbol)
+                if self.prevalidate:
+                    with self._not_found_lock:
+                        self._not_found_symbols.pop(normalize_symbol(symbol), None)
 
-            return converted_result, response
+    # Keep the symbols of a backend response without any result, they are prevalidated for prevalidate_ttl seconds
+    def _add_not_found_symbols(self, results):
+        if not self.prevalidate or self.symbol_suggester is None:
+            return
+        now = time.monotonic()
+        with self._not_found_lock:
+            for symbol, fields in results.items():
+                if not any(converted_result for converted_result, _ in fields.values()):
+                    key = normalize_symbol(symbol)
+                    self._not_found_symbols[key] = now
+                    self._not_found_symbols.move_to_end(key)
+            while len(self._not_found_symbols) > self.symbol_suggester.max_size:
+                self._not_found_symbols.popitem(last=False)
+
+    @staticmethod
+    def _set_results(results, requests, conversion_result):
+        for symbol, target_symbol_type in requests:
+            results[symbol][target_symbol_type] = conversion_result
+
+    # Get the conversion result from symbology_cache, reference_index or symbology_store, returns None if the result is not available
+    def _lookup_local(self, symbol, target_symbol_type):
+        if self.symbology_cache is not None:
+            cached = self.symbology_cache.get(symbol, target_symbol_type)
+            if cached is not None:
+                logging.debug('Data API: cache hit %s %s', symbol, target_symbol_type)
+                conversion_results.inc(field=target_symbol_type, result=_result_label(cached), source='cache')
+                return cached
+
+        if self.reference_index is not None: # The memory-mapped index lookup does not need the cache
+            indexed = self.reference_index.convert(symbol, target_symbol_type)
+            if indexed is not None:
+                conversion_results.inc(field=target_symbol_type, result='success', source='reference_index')
+                return indexed
+
+        if self.symbology_store is not None:
+            stored_response = self.symbology_store.get(symbol, target_symbol_type)
+            if stored_response is not None:
+                logging.debug('Data API: store hit %s %s', symbol, target_symbol_type)
+                conversion_results.inc(field=target_symbol_type, result='success', source='store')
+                if self.symbology_cache is not None:
+                    self.symbology_cache.put(symbol, target_symbol_type, True, stored_response)
+                return True, stored_response
+        return None
+
+    # Request a chunk of symbols and fields with one ek.get_data call, then split the raw response into one response per symbol and field
+    def _request_data(self, symbols, target_symbol_types):
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+            logging.debug('Data API: circuit open, %d symbols not requested', len(symbols))
+            return self._fallback_results(symbols, target_symbol_types, 'circuit_open')
+
+        fields_label = ','.join(target_symbol_types)
+        start_tm = time.perf_counter()
+        try:
+            with get_data_latency.time(fields=fields_label):
+                response = self.backend.get_data(symbols, target_symbol_types)
         except Exception as ex:
             logging.error('Data API: get_data exception failure: %s' % ex)
-            return False, None
+            get_data_exceptions.inc(fields=fields_label)
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure(str(ex))
+            return self._fallback_results(symbols, target_symbol_types, 'data_api')
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_success(time.perf_counter() - start_tm)
+
+        results = {}
+        for row_index, symbol in enumerate(symbols):
+            results[symbol] = {}
+            for column_index, target_symbol_type in enumerate(target_symbol_types, start = 1):
+                symbol_response = self._split_response(response, row_index, column_index)
+                converted_result = True
+                if 'error' in symbol_response or not symbol_response['data'] or not symbol_response['data'][0][1]: # The get_data can returns both 'error' and just empty/null result 
+                    converted_result = False
+
+                if self.symbology_cache is not None: # Exception failures are not cached, only success and 'not found' results
+                    self.symbology_cache.put(symbol, target_symbol_type, converted_result, symbol_response)
+                if self.symbology_store is not None and converted_result: # Only success results are kept across restarts
+                    self.symbology_store.put(symbol, target_symbol_type, symbol_response)
+                results[symbol][target_symbol_type] = (converted_result, symbol_response)
+                conversion_results.inc(field=target_symbol_type, result='success' if converted_result else 'not_found', source='data_api')
+        self._add_not_found_symbols(results)
+        return results
+
+    # Return the stale cached or stored results of symbols that cannot be requested, the other results are (False, None) errors
+    def _fallback_results(self, symbols, target_symbol_types, error_source):
+        results = {}
+        for symbol in symbols:
+            results[symbol] = {}
+            for target_symbol_type in target_symbol_types:
+                conversion_result = self._lookup_stale(symbol, target_symbol_type)
+                if conversion_result is not None:
+                    conversion_results.inc(field=target_symbol_type, result=_result_label(conversion_result), source='stale')
+                else:
+                    conversion_result = (False, None)
+                    conversion_results.inc(field=target_symbol_type, result='error', source=error_source)
+                results[symbol][target_symbol_type] = conversion_result
+        return results
+
+    # Get an expired conversion result from symbology_cache or symbology_store, returns None if there is no result
+    def _lookup_stale(self, symbol, target_symbol_type):
+        if self.symbology_cache is not None:
+            cached = self.symbology_cache.get(symbol, target_symbol_type, allow_stale=True)
+            if cached is not None:
+                return cached
+        if self.symbology_store is not None:
+            stored_response = self.symbology_store.get(symbol, target_symbol_type, allow_stale=True)
+            if stored_response is not None:
+                return True, stored_response
+        return None
+
+    # Create a single instrument and single field raw response (same structure as a single symbol ek.get_data call) 
+    # from a multi instruments and multi fields raw response
+    @staticmethod
+    def _split_response(response, row_index, column_index):
+        symbol_response = dict(response)
+        headers = response.get('headers') or [[]]
+        symbol_response['headers'] = [[header_row[0], header_row[column_index]] for header_row in headers if len(header_row) > column_index]
+        data = response.get('data') or []
+        symbol_response['data'] = [[data[row_index][0], data[row_index][column_index]]] if row_index < len(data) else []
+        symbol_response['totalRowsCount'] = len(symbol_response['data']) + 1
+        symbol_response['totalColumnsCount'] = 2
+        symbol_response.pop('error', None)
+        errors = [dict(error, row = 0, col = 1) for error in response.get('error', []) 
+            if error.get('row') == row_index and error.get('col', column_index) == column_index]
+        if errors:
+            symbol_response['error'] = errors
+        return symbol_response
     
-    # verify if Eikon Data API is connect to Refinitiv Workspace/Eikon Desktop application
+    # verify if Eikon Data API is connect to Refinitiv Workspace/Eikon Desktop application (or the backend is available)
     def verify_desktop_connection(self):
-        return ek.get_port_number()
+        return self.backend.is_available()
 
 # =============================== Main Process, For verifying your Eikon Data API Access purpose ============================
 if __name__ == '__main__':
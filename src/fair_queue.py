@@ -0,0 +1,101 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |      Weighted round-robin queue, fair scheduling between senders          --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for queue and thread operations
+import queue
+import threading
+import time
+from collections import deque
+
+# Current key value before the first item of a turn, None is a valid key
+_no_key = object()
+
+
+class FairQueue:
+
+    '''
+    Bounded queue with one FIFO sub-queue per key (e.g. the message sender). get() serves the keys in weighted round-robin
+    order: up to weight items of a key, then the next key, so a sender with hundreds of queued messages does not delay
+    the other senders. The items of the same key keep their order. The None key (e.g. the messages without a sender) is
+    a key of the round-robin like the others, all items count toward maxsize.
+    Same put()/get()/qsize() behavior as queue.Queue, put() raises queue.Full after timeout seconds. put_last() queues a
+    control item (e.g. a stop item) that is served after all other items.
+    '''
+
+    # Constructor function, weights is a dictionary of key and weight (default_weight for the other keys)
+    def __init__(self, maxsize=0, weights=None, default_weight=1):
+        self.maxsize = maxsize
+        self.weights = dict(weights or {})
+        self.default_weight = max(1, default_weight)
+        self._queues = {}  # key -> deque of items
+        self._active = deque()  # keys with queued items, in round-robin order
+        self._last_items = deque()  # put_last() items
+        self._current_key = _no_key
+        self._current_served = 0
+        self._size = 0
+        self._condition = threading.Condition()
+
+    def put(self, item, key=None, timeout=None):
+        with self._condition:
+            if self.maxsize > 0:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while self._size >= self.maxsize:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Full
+                    self._condition.wait(remaining)
+            key_queue = self._queues.get(key)
+            if key_queue is None:
+                key_queue = self._queues[key] = deque()
+                self._active.append(key)
+            key_queue.append(item)
+            self._size += 1
+            self._condition.notify_all()
+
+    # Queue an item that is served after all other items, it does not count toward maxsize
+    def put_last(self, item):
+        with self._condition:
+            self._last_items.append(item)
+            self._condition.notify_all()
+
+    def get(self):
+        with self._condition:
+            while not self._active and not self._last_items:
+                self._condition.wait()
+            if not self._active:
+                return self._last_items.popleft()
+
+            key = self._active[0]
+            if key != self._current_key:
+                self._current_key = key
+                self._current_served = 0
+            key_queue = self._queues[key]
+            item = key_queue.popleft()
+            self._size -= 1
+            self._current_served += 1
+            if not key_queue: # The key has no more items, remove it from the round
+                del self._queues[key]
+                self._active.popleft()
+                self._current_key = _no_key
+            elif self._current_served >= self.weights.get(key, self.default_weight): # Next key's turn
+                self._active.rotate(-1)
+                self._current_key = _no_key
+            self._condition.notify_all()
+            return item
+
+    def qsize(self):
+        with self._condition:
+            return self._size
+
+    # Return the number of queued items of each key
+    def key_sizes(self):
+        with self._condition:
+            return {key: len(key_queue) for key, key_queue in self._queues.items()}
@@ -0,0 +1,114 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |   Pooled keep-alive HTTP session for Messenger BOT API and RDP calls      --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for HTTP operations
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import registry
+
+# HTTP metrics, the endpoint label is the last URL path segment (e.g. 'token', 'chatrooms', 'join', 'post')
+http_requests = registry.counter('http_requests_total', 'Messenger BOT API and RDP HTTP requests by endpoint and status code',
+                                 ['method', 'endpoint', 'status'])
+http_request_latency = registry.histogram('http_request_seconds', 'Latency of the Messenger BOT API and RDP HTTP requests (including retries)',
+                                          ['method', 'endpoint'])
+
+
+class HTTPSessionManagement:
+
+    '''
+    Share one requests.Session, so every HTTP request reuses the pooled keep-alive TCP/TLS connections.
+    The 429 and 5xx responses are retried with exponential backoff (the Retry-After header is honoured).
+    A POST request (e.g. a chatroom post) may be processed by the server before a read timeout or a gateway 5xx,
+    so it is retried only after connect errors and 429/503 responses, unless it is sent with idempotent=True
+    (e.g. the RDP token request). With retry_rate_limited=False the 429 responses are returned without retries,
+    for the callers that handle the rate limit themselves (e.g. the outbound queue).
+    If the request does not have an Authorization header, the current access token is added automatically
+    from the access_token parameter or the token_provider function.
+    '''
+
+    # HTTP session parameters
+    pool_size = 10
+    timeout = 10  # seconds
+    retries = 3
+    backoff_factor = 0.5  # seconds, the retry waits backoff_factor * (2 ^ retry number)
+    retry_status = (429, 500, 502, 503, 504)
+    non_idempotent_retry_status = (429, 503)  # the responses of the requests that are not processed by the server
+
+    # Constructor function
+    def __init__(self, pool_size=10, timeout=10, retries=3, backoff_factor=0.5, token_provider=None):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.token_provider = token_provider
+
+        # One session per retry policy: (idempotent, retry_rate_limited) key and the session
+        self._sessions = {(idempotent, retry_rate_limited): self._create_session(idempotent, retry_rate_limited)
+                          for idempotent in (True, False) for retry_rate_limited in (True, False)}
+        self.session = self._sessions[(True, True)]
+
+    def _create_session(self, idempotent, retry_rate_limited):
+        retry_status = self.retry_status if idempotent else self.non_idempotent_retry_status
+        if not retry_rate_limited:
+            retry_status = tuple(status for status in retry_status if status != 429)
+        retry = Retry(total=self.retries,
+                      read=None if idempotent else 0, # A read error may happen after the request is processed
+                      other=None if idempotent else 0,
+                      backoff_factor=self.backoff_factor,
+                      status_forcelist=retry_status,
+                      allowed_methods=frozenset(['GET', 'POST']),
+                      # urllib3 retries any 429/503 response with a Retry-After header while it is respected
+                      respect_retry_after_header=retry_rate_limited,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    # Send a HTTP request message with the pooled session. Set authorize=False for requests without a Bearer token (RDP authentication)
+    # and retry_rate_limited=False to return the 429 responses without retries. The POST requests are not idempotent by default
+    def request(self, method, url, access_token=None, authorize=True, retry_rate_limited=True, idempotent=None, **kwargs):
+        headers = dict(kwargs.pop('headers', None) or {})
+        if authorize and 'Authorization' not in headers:
+            if access_token is None and self.token_provider is not None:
+                access_token = self.token_provider()
+            if access_token:
+                headers['Authorization'] = 'Bearer {}'.format(access_token)
+        kwargs.setdefault('timeout', self.timeout)
+
+        endpoint = url.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+        status = 'exception'
+        start_tm = time.perf_counter()
+        try:
+            if idempotent is None:
+                idempotent = method != 'POST'
+            session = self._sessions[(idempotent, retry_rate_limited)]
+            response = session.request(method, url, headers=headers, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            http_request_latency.observe(time.perf_counter() - start_tm, method=method, endpoint=endpoint)
+            http_requests.inc(method=method, endpoint=endpoint, status=status)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    # Close all pooled connections
+    def close(self):
+        for session in self._sessions.values():
+            session.close()
@@ -0,0 +1,75 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |    JSON codec for the WebSocket messages and REST bodies (orjson/ujson)   --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for JSON operations
+import os
+import json
+import logging
+
+'''
+The codec is the first installed library of JSON_CODEC environment variable (orjson, ujson or json) or orjson, ujson, json.
+The optional libraries are not in requirements.txt, install one of them with "pip install orjson" for faster messages processing.
+    - loads(text): parse a str/bytes JSON document
+    - dumps(obj): serialize a JSON object to a str, the non-ASCII characters may not be escaped (encode the str with UTF-8)
+'''
+codec_name = None
+loads = None
+dumps = None
+
+
+def _json_dumps(obj):
+    return json.dumps(obj, separators=(',', ':'))
+
+
+# Select the codec library, returns the selected library name
+def load_codec(preferred=None):
+    global codec_name, loads, dumps
+    candidates = [preferred] if preferred else []
+    candidates += [name for name in ('orjson', 'ujson', 'json') if name != preferred]
+    for name in candidates:
+        if name == 'orjson':
+            try:
+                import orjson
+            except ImportError:
+                continue
+            codec_name, loads, dumps = name, orjson.loads, lambda obj, _dumps=orjson.dumps: _dumps(obj).decode('utf-8')
+        elif name == 'ujson':
+            try:
+                import ujson
+            except ImportError:
+                continue
+            codec_name, loads, dumps = name, ujson.loads, ujson.dumps
+        elif name == 'json':
+            codec_name, loads, dumps = name, json.loads, _json_dumps
+        else:
+            logging.warning('JSON codec: unknown codec %s' % name)
+            continue
+        return codec_name
+
+
+load_codec(os.getenv('JSON_CODEC', '').strip().lower() or None)
+
+
+'''
+Decode a Messenger BOT API WebSocket message to a dictionary of only the fields the chat bot uses:
+    {'event': ..., 'chatroomId': ..., 'post': {'message': ..., 'sender': {'email': ...}}}
+The 'post' field is set only for the chatroomPost messages, the other fields of the message are dropped so the
+queued messages are small.
+'''
+def decode_event(message):
+    message_json = loads(message)
+    event = {'event': message_json.get('event')}
+    if 'chatroomId' in message_json:
+        event['chatroomId'] = message_json['chatroomId']
+    post = message_json.get('post')
+    if isinstance(post, dict):
+        event['post'] = {'message': post.get('message'), 'sender': {'email': (post.get('sender') or {}).get('email')}}
+    return event
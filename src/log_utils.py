@@ -0,0 +1,124 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |     Lazy JSON log formatting, log sampling and secret redaction           --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for logging, JSON and Regular Expression operations
+import os
+import re
+import json
+import logging
+import threading
+from collections import defaultdict
+
+# Keys of the values that are never written to the log
+sensitive_keys = frozenset(['access_token', 'refresh_token', 'password', 'client_secret', 'ststoken', 'authorization'])
+redacted_value = '***'
+
+# Matches the sensitive values in a formatted log message: JSON ("key": "value"), form (key=value) and Bearer token
+_redact_patterns = [
+    (re.compile(r'("(?:%s)"\s*:\s*")[^"]*(")' % '|'.join(sensitive_keys), flags=re.IGNORECASE), r'\1%s\2' % redacted_value),
+    (re.compile(r"('(?:%s)'\s*:\s*')[^']*(')" % '|'.join(sensitive_keys), flags=re.IGNORECASE), r'\1%s\2' % redacted_value),
+    (re.compile(r'\b((?:%s)=)[^&\s]+' % '|'.join(sensitive_keys), flags=re.IGNORECASE), r'\1%s' % redacted_value),
+    (re.compile(r'(Bearer\s+)[\w\-.~+/=]+'), r'\1%s' % redacted_value)
+]
+
+
+# Return a copy of a JSON object with the sensitive values replaced
+def redact(obj):
+    if isinstance(obj, dict):
+        return {key: redacted_value if str(key).lower() in sensitive_keys else redact(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [redact(value) for value in obj]
+    return obj
+
+
+# Replace the sensitive values in a text
+def redact_text(text):
+    for pattern, replacement in _redact_patterns:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class LazyJson:
+
+    '''
+    Log argument that pretty-prints a JSON object (or a JSON string/HTTP response body) with the sensitive values redacted.
+    The formatting runs only when the log record is emitted, e.g. logging.debug('Received: %s', LazyJson(message_json)).
+    '''
+
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        obj = self.obj
+        if hasattr(obj, 'json') and hasattr(obj, 'text'):  # HTTP response
+            try:
+                obj = obj.json()
+            except ValueError:
+                return redact_text(obj.text)
+        elif isinstance(obj, (str, bytes)):
+            try:
+                obj = json.loads(obj)
+            except ValueError:
+                return redact_text(obj if isinstance(obj, str) else obj.decode('utf-8', 'replace'))
+        return json.dumps(redact(obj), sort_keys=True, indent=2, separators=(',', ':'))
+
+
+class LogSampler:
+
+    '''
+    Log only one of every `every` high-volume events of each kind, e.g.
+        if message_log_sampler.sample('received'): logging.debug(...)
+    every=1 logs all events.
+    '''
+
+    # Constructor function
+    def __init__(self, every=1):
+        self.every = max(1, every)
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def sample(self, kind='default'):
+        if self.every == 1:
+            return True
+        with self._lock:
+            self._counts[kind] += 1
+            return self._counts[kind] % self.every == 1
+
+
+class RedactingFilter(logging.Filter):
+
+    '''
+    Logging filter that replaces the sensitive values in the formatted message of every emitted record,
+    it covers the log messages that do not use LazyJson.
+    '''
+
+    def filter(self, record):
+        message = record.getMessage()
+        redacted = redact_text(message)
+        if redacted != message:
+            record.msg = redacted
+            record.args = None
+        return True
+
+
+# Return the logging level of the LOG_LEVEL environment variable (DEBUG, INFO, WARNING, ERROR), or the default level
+def get_log_level(default=logging.INFO):
+    level = logging.getLevelName(os.getenv('LOG_LEVEL', '').strip().upper())
+    return level if isinstance(level, int) else default
+
+
+# Setting Python Logging with the redacting filter on all root handlers
+def configure_logging(level):
+    logging.basicConfig(format='%(asctime)s: %(levelname)s:%(name)s :%(message)s', level=level, datefmt='%Y-%m-%d %H:%M:%S')
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(RedactingFilter())
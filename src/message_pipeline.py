@@ -0,0 +1,161 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |   Worker pool pipeline for processing chat messages off the WebSocket     --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for queue and thread operations
+import queue
+import threading
+import time
+import logging
+import zlib
+from collections import deque
+
+from fair_queue import FairQueue
+
+# Queue item that tells the worker and sender threads to stop
+_stop_item = None
+
+
+class MessagePipeline:
+
+    '''
+    Incoming chat messages are put on a bounded per-worker queue, handled by a pool of conversion worker threads,
+    then the replies are posted to the chatrooms from a separate sender thread.
+        - handler: function(message_json) that returns a (room_id, response_message) tuple or None
+        - sender: function(room_id, response_message) that posts a reply to the chatroom
+    All messages of the same chatroom go to the same worker queue, so the replies of each chatroom keep the incoming order.
+    With a fair_key function (e.g. the message sender), each worker queue is a FairQueue that serves the fair_key values in
+    weighted round-robin order (weights dictionary), the replies of each sender keep the incoming order.
+    '''
+
+    # Pipeline parameters
+    workers = 4
+    queue_size = 1000  # maximum number of messages waiting in each worker queue
+    put_timeout = 1.0  # seconds submit() waits for a free queue slot before dropping the message
+
+    # Constructor function
+    def __init__(self, handler, sender, workers=4, queue_size=1000, put_timeout=1.0, fair_key=None, weights=None):
+        self.handler = handler
+        self.sender = sender
+        self.workers = workers
+        self.queue_size = queue_size
+        self.put_timeout = put_timeout
+        self.fair_key = fair_key
+
+        if fair_key is not None:
+            self._worker_queues = [FairQueue(queue_size, weights) for _ in range(workers)]
+        else:
+            self._worker_queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._outbound_queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+
+        # Pipeline metrics
+        self.received = 0
+        self.dropped = 0
+        self.processed = 0
+        self.sent = 0
+        self.failed = 0
+        self._latencies = deque(maxlen=1000)  # end-to-end latencies (seconds) of the recent replies
+
+    # Start the conversion worker threads and the sender thread
+    def start(self):
+        for index, worker_queue in enumerate(self._worker_queues):
+            thread = threading.Thread(target=self._run_worker, args=(worker_queue,), name='pipeline-worker-%d' % index, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._run_sender, name='pipeline-sender', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    # Stop the threads after all queued messages have been processed and sent
+    def stop(self):
+        for worker_queue in self._worker_queues:
+            if isinstance(worker_queue, FairQueue): # The stop item is served after the queued messages of all senders
+                worker_queue.put_last(_stop_item)
+            else:
+                worker_queue.put(_stop_item)
+        for thread in self._threads[:-1]:
+            thread.join()
+        self._outbound_queue.put(_stop_item)
+        self._threads[-1].join()
+        self._threads = []
+
+    '''
+    Put an incoming message on its chatroom worker queue. If the queue is full, the caller is blocked for
+    up to put_timeout seconds (backpressure), then the message is dropped and the function returns False.
+    '''
+    def submit(self, message_json):
+        room_id = str(message_json.get('chatroomId', ''))
+        worker_queue = self._worker_queues[zlib.crc32(room_id.encode('utf-8')) % self.workers]
+        with self._lock:
+            self.received += 1
+        try:
+            if self.fair_key is not None:
+                worker_queue.put((time.monotonic(), message_json), key=self.fair_key(message_json), timeout=self.put_timeout)
+            else:
+                worker_queue.put((time.monotonic(), message_json), timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logging.warning('Message Pipeline: worker queue is full, drop message from chatroom %s' % room_id)
+            return False
+
+    def _run_worker(self, worker_queue):
+        while True:
+            item = worker_queue.get()
+            if item is _stop_item:
+                break
+            received_tm, message_json = item
+            try:
+                reply = self.handler(message_json)
+            except Exception as error:
+                logging.error('Message Pipeline: handle message failure: %s' % error)
+                reply = None
+            with self._lock:
+                self.processed += 1
+            if reply:
+                self._outbound_queue.put((received_tm, reply))
+
+    def _run_sender(self):
+        while True:
+            item = self._outbound_queue.get()
+            if item is _stop_item:
+                break
+            received_tm, (room_id, response_message) = item
+            try:
+                self.sender(room_id, response_message)
+                with self._lock:
+                    self.sent += 1
+                    self._latencies.append(time.monotonic() - received_tm)
+            except Exception as error:
+                with self._lock:
+                    self.failed += 1
+                logging.error('Message Pipeline: send reply failure: %s' % error)
+
+    # Return pipeline metrics for logging/monitoring purpose, latencies are in milliseconds
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                'received': self.received,
+                'dropped': self.dropped,
+                'processed': self.processed,
+                'sent': self.sent,
+                'failed': self.failed,
+                'worker_queue_depths': [worker_queue.qsize() for worker_queue in self._worker_queues],
+                'outbound_queue_depth': self._outbound_queue.qsize()
+            }
+        if latencies:
+            stats['latency_p50_ms'] = latencies[len(latencies) // 2] * 1000
+            stats['latency_p99_ms'] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            stats['latency_max_ms'] = latencies[-1] * 1000
+        return stats
@@ -0,0 +1,248 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |   Prometheus text format counters, histograms and the /metrics endpoint   --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for HTTP, thread and time operations
+import bisect
+import functools
+import threading
+import time
+import logging
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+# Format the {label="value",...} part of a metric line
+def _format_labels(labelnames, labelvalues, extra=''):
+    labels = ['%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+              for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        labels.append(extra)
+    return '{%s}' % ','.join(labels) if labels else ''
+
+
+class Counter:
+
+    '''
+    Monotonic counter per label values, e.g. http_requests.inc(endpoint='post', status=200)
+    '''
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(tuple(labels[name] for name in self.labelnames), 0)
+
+    def render(self):
+        with self._lock:
+            values = list(self._values.items())
+        return ['%s%s %s' % (self.name, _format_labels(self.labelnames, key), value) for key, value in values]
+
+
+class Histogram:
+
+    '''
+    Cumulative bucket histogram of observed values (seconds) per label values.
+    Use observe(seconds, **labels), "with histogram.time(**labels):" around the measured code
+    or the @histogram.timed(**labels) function decorator.
+    '''
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=default_buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    # Function decorator that observes the duration of each call
+    def timed(self, **labels):
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with _Timer(self, labels):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render(self):
+        with self._lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+        lines = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts[:-1]):
+                cumulative += count
+                lines.append('%s_bucket%s %d' % (self.name, _format_labels(self.labelnames, key, 'le="%s"' % bound), cumulative))
+            lines.append('%s_sum%s %s' % (self.name, _format_labels(self.labelnames, key), counts[-1]))
+            lines.append('%s_count%s %d' % (self.name, _format_labels(self.labelnames, key), cumulative))
+        return lines
+
+
+class _Timer:
+
+    __slots__ = ('histogram', 'labels', 'start_tm')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start_tm = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start_tm, **self.labels)
+        return False
+
+
+class Gauge:
+
+    '''
+    Gauge that reads its current value from a function when the metrics are collected, e.g. a queue depth.
+    The function returns a number, or a dictionary of label values tuple and number.
+    '''
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, function, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        try:
+            value = self.function()
+        except Exception as error:
+            logging.error('Metrics: gauge %s failure: %s' % (self.name, error))
+            return []
+        if isinstance(value, dict):
+            return ['%s%s %s' % (self.name, _format_labels(self.labelnames, key), item) for key, item in value.items()]
+        return ['%s %s' % (self.name, value)]
+
+
+class MetricsRegistry:
+
+    '''
+    Collection of the application metrics. The metric objects are created once at module level,
+    then updated from the hot paths (a dictionary update under a lock).
+    '''
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=default_buckets):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    # Register (or replace) a gauge function
+    def gauge(self, name, documentation, function, labelnames=()):
+        gauge = Gauge(name, documentation, function, labelnames)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    # Return all metrics in the Prometheus text exposition format
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append('# HELP %s %s' % (metric.name, metric.documentation))
+            lines.append('# TYPE %s %s' % (metric.name, metric.kind))
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# The application metrics registry
+registry = MetricsRegistry()
+
+
+class MetricsServer:
+
+    '''
+    Local HTTP server that serves the registry metrics at GET /metrics for a Prometheus scraper.
+    '''
+
+    # Constructor function
+    def __init__(self, metrics_registry=registry, host='127.0.0.1', port=9100):
+        self.registry = metrics_registry
+        self._server = ThreadingHTTPServer((host, port), self._create_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _create_handler(self):
+        metrics_registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                payload = metrics_registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
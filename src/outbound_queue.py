@@ -0,0 +1,192 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |   Per-chatroom outbound message batching with rate limit and 429 retry    --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for thread, time and HTTP date operations
+import threading
+import time
+import logging
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from rate_limiter import TokenBucket
+
+
+class OutboundQueue:
+
+    '''
+    Queue the reply messages per chatroom and post them from a sender thread.
+        - The messages of a chatroom that arrive within batch_window seconds are merged into one post
+          (up to max_batch_messages messages and max_batch_length characters).
+        - The posts are limited to rate posts per second with bursts of up to burst posts (token bucket).
+        - A post answered with HTTP 429 pauses all posts for the Retry-After seconds, then it is retried
+          up to max_retries times.
+        - post: function(room_id, text) that posts a message and returns the HTTP response (or None on failure)
+    '''
+
+    # Queue parameters
+    batch_window = 0.2  # seconds
+    max_batch_messages = 50
+    max_batch_length = 4000  # characters
+    rate = 5  # posts per second, 0 for unlimited
+    burst = 10  # posts
+    max_retries = 3
+    retry_delay = 1  # seconds, used if the 429 response does not have a valid Retry-After header
+
+    message_separator = '\n\n'
+
+    # Constructor function
+    def __init__(self, post, batch_window=0.2, max_batch_messages=50, max_batch_length=4000, rate=5, burst=10,
+                 max_retries=3, retry_delay=1):
+        self.post = post
+        self.batch_window = batch_window
+        self.max_batch_messages = max_batch_messages
+        self.max_batch_length = max_batch_length
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.rate_limiter = TokenBucket(rate, burst)
+
+        self._pending = {}  # room_id -> deque of [queued time, text, retries]
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._paused_until = 0
+        self._thread = None
+
+        # Queue statistics
+        self.queued = 0
+        self.posts = 0
+        self.merged = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.failed = 0
+
+    # Start the sender thread
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='outbound-queue-sender', daemon=True)
+            self._thread.start()
+
+    # Post all queued messages, then stop the sender thread
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # Queue a message for a chatroom
+    def put(self, room_id, text):
+        with self._condition:
+            self._pending.setdefault(room_id, deque()).append([time.monotonic(), text, 0])
+            self.queued += 1
+            self._condition.notify()
+
+    # Wait for the next chatroom batch, returns a (room_id, [items]) tuple or None when the queue is stopped and empty
+    def _next_batch(self):
+        with self._condition:
+            while True:
+                if not self._pending:
+                    if self._stopping:
+                        return None
+                    self._condition.wait()
+                    continue
+
+                # Serve the chatroom with the oldest message first
+                room_id, messages = min(self._pending.items(), key=lambda item: item[1][0][0])
+                wait = messages[0][0] + self.batch_window - time.monotonic()
+                if wait > 0 and len(messages) < self.max_batch_messages and not self._stopping:
+                    self._condition.wait(wait)
+                    continue
+
+                batch = [messages.popleft()]
+                length = len(batch[0][1])
+                while messages and len(batch) < self.max_batch_messages:
+                    length += len(self.message_separator) + len(messages[0][1])
+                    if length > self.max_batch_length:
+                        break
+                    batch.append(messages.popleft())
+                if not messages:
+                    del self._pending[room_id]
+                return room_id, batch
+
+    # Put a rate limited batch back in front of its chatroom queue as a single message
+    def _requeue(self, room_id, queued_tm, text, retries):
+        with self._condition:
+            self._pending.setdefault(room_id, deque()).appendleft([queued_tm, text, retries])
+
+    # Returns the seconds of the Retry-After header (delay-seconds or HTTP-date)
+    def _retry_after(self, response):
+        value = response.headers.get('Retry-After')
+        try:
+            return max(0.0, float(value))
+        except (TypeError, ValueError):
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return self.retry_delay
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                break
+            room_id, items = batch
+            text = self.message_separator.join(item[1] for item in items)
+            retries = max(item[2] for item in items)
+
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            self.rate_limiter.acquire()
+
+            try:
+                response = self.post(room_id, text)
+            except Exception as error:
+                logging.error('Outbound Queue: post message to chatroom %s failure: %s' % (room_id, error))
+                response = None
+
+            with self._condition:
+                self.posts += 1
+                self.merged += len(items) - 1
+                if response is None:
+                    self.failed += len(items)
+                    continue
+                if response.status_code != 429:
+                    if response.status_code != 200:
+                        self.failed += len(items)
+                    continue
+                self.rate_limited += 1
+
+            retry_after = self._retry_after(response)
+            self._paused_until = time.monotonic() + retry_after
+            if retries < self.max_retries:
+                logging.warning('Outbound Queue: chatroom %s post is rate limited, retry in %.1f seconds' % (room_id, retry_after))
+                with self._condition:
+                    self.retries += 1
+                self._requeue(room_id, items[0][0], text, retries + 1)
+            else:
+                logging.error('Outbound Queue: chatroom %s post is rate limited, drop %d messages' % (room_id, len(items)))
+                with self._condition:
+                    self.failed += len(items)
+
+    # Return queue statistics for logging/monitoring purpose
+    def stats(self):
+        with self._condition:
+            return {
+                'queued': self.queued,
+                'posts': self.posts,
+                'merged': self.merged,
+                'rate_limited': self.rate_limited,
+                'retries': self.retries,
+                'failed': self.failed,
+                'pending': sum(len(messages) for messages in self._pending.values())
+            }
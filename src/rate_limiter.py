@@ -0,0 +1,73 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |              Thread-safe token bucket rate limiter                       --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for thread and time operations
+import threading
+import time
+
+
+class TokenBucket:
+
+    '''
+    Allow up to rate operations per second on average, with bursts of up to capacity operations.
+    A rate of 0 (or less) disables the limit.
+    '''
+
+    # Constructor function
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity else max(1, rate)
+        self._tokens = float(self.capacity)
+        self._updated_tm = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_tm) * self.rate)
+        self._updated_tm = now
+
+    '''
+    Take the tokens if they are available. Returns 0 on success, otherwise the seconds to wait
+    until the tokens are available (the tokens are not taken).
+    '''
+    def consume(self, tokens=1):
+        if self.rate <= 0:
+            return 0
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    # Give back tokens taken by consume(), e.g. when another limit rejects the operation
+    def refund(self, tokens=1):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+    # Return the number of tokens available now
+    def available(self):
+        if self.rate <= 0:
+            return float('inf')
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    # Block until the tokens are taken, returns the seconds spent waiting
+    def acquire(self, tokens=1):
+        waited = 0.0
+        delay = self.consume(tokens)
+        while delay > 0:
+            time.sleep(delay)
+            waited += delay
+            delay = self.consume(tokens)
+        return waited
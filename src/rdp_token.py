@@ -18,6 +18,14 @@ import logging
 import os
 from dotenv import load_dotenv
 
+from http_session import HTTPSessionManagement # Module for the pooled keep-alive HTTP session
+from log_utils import LazyJson # Module for lazy and redacted logging
+from metrics import registry
+
+# RDP token request metrics
+token_request_latency = registry.histogram('rdp_token_request_seconds', 'Latency of the RDP token requests by grant type', ['grant_type'])
+token_requests = registry.counter('rdp_token_requests_total', 'RDP token requests by grant type and status code', ['grant_type', 'status'])
+
 # Authentication objects
 auth_obj = None
 
@@ -38,6 +46,8 @@ class RDPTokenManagement:
 
     access_token = ''
     refresh_token = ''
+    # In-memory copy of the token file content, the file is read only once
+    saved_auth_obj = None
 
     # RDP Authentication Service Detail
     rdp_authen_version = os.getenv('RDP_AUTH_VERSION')
@@ -52,11 +62,13 @@ class RDPTokenManagement:
     authen_URL = '{}{}{}/token'.format(base_URL,
                                        category_URL, rdp_authen_version)
 
-    def __init__(self, username, password, app_key,  before_timeout=10):
+    # Pass a shared HTTPSessionManagement object to reuse its pooled connections, otherwise the object creates its own session
+    def __init__(self, username, password, app_key,  before_timeout=10, http_session=None):
         self.username = username
         self.password = password
         self.app_key = app_key
         self.before_timeout = before_timeout
+        self.http_session = http_session if http_session is not None else HTTPSessionManagement()
 
     # Create new RDP Authentication request message and send it to RDP service
     def request_new_token(self, refresh_token, url=None):
@@ -81,28 +93,34 @@ class RDPTokenManagement:
                 'grant_type': 'refresh_token',
             }
         response = None
+        grant_type = authen_request_msg['grant_type']
 
         # Print for debugging purpose
-        logging.debug('Sent: %s' % (json.dumps(
-            authen_request_msg, sort_keys=True, indent=2, separators=(',', ':'))))
+        logging.debug('Sent: %s', LazyJson(authen_request_msg))
         try:
-            # Send request message to RDP with Python requests module
-            response = requests.post(url,
-                                     headers={
-                                         'Accept': 'application/json',
-                                         'Content-Type': 'application/x-www-form-urlencoded'},
-                                     data=authen_request_msg,
-                                     auth=(
-                                         self.app_key,
-                                         self.client_secret
-                                     ))
+            # Send request message to RDP with the pooled HTTP session
+            with token_request_latency.time(grant_type=grant_type):
+                response = self.http_session.post(url,
+                                         authorize=False,
+                                         idempotent=True, # A new token request can be sent again
+                                         headers={
+                                             'Accept': 'application/json',
+                                             'Content-Type': 'application/x-www-form-urlencoded'},
+                                         data=authen_request_msg,
+                                         auth=(
+                                             self.app_key,
+                                             self.client_secret
+                                         ))
         except requests.exceptions.RequestException as e:
             logging.error('RDP authentication exception failure: %s' % (e))
+            token_requests.inc(grant_type=grant_type, status='exception')
+            return None, None
+        token_requests.inc(grant_type=grant_type, status=response.status_code)
 
         if response.status_code == 200:  # HTTP Status 'OK'
             print('Authentication success')
             # Print RDP authentication response message for debugging purpose
-            logging.debug('Receive: %s' % (json.dumps(response.json(), sort_keys=True, indent=2, separators=(',', ':'))))
+            logging.debug('Receive: %s', LazyJson(response))
         else:  # Handle HTTP error
             logging.error('RDP authentication result failure: %s %s' % (response.status_code, response.reason))
             logging.error('Text: %s' % (response.text))
@@ -139,6 +157,7 @@ class RDPTokenManagement:
             ) + int(_authen_obj['expires_in']) - self.before_timeout
 
             json.dump(_authen_obj, saved_token, indent=4)
+        self.saved_auth_obj = _authen_obj
 
     """
     Get RDP Authentication Token.
@@ -153,16 +172,18 @@ class RDPTokenManagement:
         is_request_error = False
         try:
             if save_token_to_file: # chatbot_demo_rest.js
-                print('Checking RDP token information in %s' %
-                      (self.token_file))
-                with open(self.token_file, 'r+') as saved_token:  # Open './token.txt' file
-                    auth_obj = json.load(saved_token)
-                    if auth_obj['expires_tm'] > time.time():  # Access Token is still active
-                        print('Token is still active')
-                        return auth_obj
-                    else:
-                        # Access Token expire
-                        print('Token expired, request a new Token with a refresh token')
+                auth_obj = self.saved_auth_obj
+                if auth_obj is None: # Read the token file only if the token is not in memory
+                    print('Checking RDP token information in %s' %
+                          (self.token_file))
+                    with open(self.token_file, 'r+') as saved_token:  # Open './token.txt' file
+                        auth_obj = json.load(saved_token)
+                    self.saved_auth_obj = auth_obj
+                if auth_obj['expires_tm'] > time.time():  # Access Token is still active
+                    return auth_obj
+                else:
+                    # Access Token expire
+                    print('Token expired, request a new Token with a refresh token')
                         
                 # chatbot_demo_rest.js
                 status, auth_obj = self.request_new_token(auth_obj['refresh_token'])
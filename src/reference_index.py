@@ -0,0 +1,235 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |     Memory-mapped symbology reference index for local lookups            --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for binary file, CSV and JSON operations
+import os
+import sys
+import csv
+import json
+import mmap
+import struct
+import getopt
+import zlib
+
+from symbology_cache import normalize_symbol
+
+'''
+Index file layout (little-endian):
+    - magic (8 bytes), metadata length (uint32), metadata JSON (fields, display names, widths, offsets and counts)
+    - records: record_count fixed width records, each field value is UTF-8 padded with NUL bytes to its field width
+    - slots: slot_count open addressing hash table slots of (record number + 1, field number) uint32 pairs, 0 is an empty slot.
+      Every identifier of every record is a key (crc32 of the upper case identifier, linear probing)
+'''
+index_magic = b'SYMIDX01'
+_header = struct.Struct('<8sI')
+_slot = struct.Struct('<II')
+
+# Workspace fields of the index and their display names (as ek.get_data returns them in the response headers)
+index_fields = ['TR.RIC', 'TR.ISIN', 'TR.SEDOL', 'TR.CUSIP', 'TR.LipperRICCode', 'TR.OrganizationID']
+display_names = {'TR.RIC': 'RIC', 'TR.ISIN': 'ISIN', 'TR.SEDOL': 'SEDOL', 'TR.CUSIP': 'CUSIP',
+                 'TR.LipperRICCode': 'Lipper RIC Code', 'TR.OrganizationID': 'Organization PermID'}
+# Accepted CSV column names (case-insensitive) of each field
+column_aliases = {'ric': 'TR.RIC', 'isin': 'TR.ISIN', 'sedol': 'TR.SEDOL', 'cusip': 'TR.CUSIP',
+                  'lipperid': 'TR.LipperRICCode', 'oapermid': 'TR.OrganizationID', 'organizationid': 'TR.OrganizationID'}
+column_aliases.update({field.lower(): field for field in index_fields})
+
+
+class ReferenceIndex:
+
+    '''
+    Read-only symbology reference index built by build_reference_index(). The file is memory-mapped, a lookup hashes
+    the identifier, probes the slot table and reads one fixed width record, no table is loaded into Python objects.
+    Any identifier (RIC, ISIN, SEDOL, CUSIP, Lipper ID or Organization PermID) resolves to the other fields.
+    '''
+
+    # Constructor function
+    def __init__(self, index_file):
+        self.index_file = index_file
+        with open(index_file, 'rb') as index:
+            self._mmap = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, metadata_length = _header.unpack_from(self._mmap, 0)
+        if magic != index_magic:
+            self._mmap.close()
+            raise ValueError('%s is not a symbology reference index file' % index_file)
+        metadata = json.loads(self._mmap[_header.size:_header.size + metadata_length].decode('utf-8'))
+
+        self.fields = metadata['fields']
+        self.display_names = metadata['display_names']
+        self.record_count = metadata['record_count']
+        self._field_index = {field: index for index, field in enumerate(self.fields)}
+        self._widths = metadata['widths']
+        self._field_offsets = [sum(self._widths[:index]) for index in range(len(self._widths))]
+        self._record_width = metadata['record_width']
+        self._records_offset = metadata['records_offset']
+        self._slots_offset = metadata['slots_offset']
+        self._slot_mask = metadata['slot_count'] - 1
+
+    def close(self):
+        self._mmap.close()
+
+    def __len__(self):
+        return self.record_count
+
+    def _value(self, record_number, field_number):
+        offset = self._records_offset + record_number * self._record_width + self._field_offsets[field_number]
+        return self._mmap[offset:offset + self._widths[field_number]].rstrip(b'\0')
+
+    # Return the record number of an identifier, or None
+    def _find(self, symbol):
+        key = normalize_symbol(symbol).encode('utf-8')
+        slot = zlib.crc32(key) & self._slot_mask
+        while True:
+            record, field_number = _slot.unpack_from(self._mmap, self._slots_offset + slot * _slot.size)
+            if not record:
+                return None
+            if self._value(record - 1, field_number).upper() == key:
+                return record - 1
+            slot = (slot + 1) & self._slot_mask
+
+    # Return the target_symbol_type value of symbol, or None if the symbol or its value is not in the index
+    def lookup(self, symbol, target_symbol_type):
+        field_number = self._field_index.get(target_symbol_type)
+        if field_number is None:
+            return None
+        record = self._find(symbol)
+        if record is None:
+            return None
+        return self._value(record, field_number).decode('utf-8') or None
+
+    '''
+    Returns a (True, response) conversion result with the same single instrument raw response structure as
+    ek.get_data(symbol, target_symbol_type, raw_output=True), or None if the index does not have the value.
+    '''
+    def convert(self, symbol, target_symbol_type):
+        value = self.lookup(symbol, target_symbol_type)
+        if value is None:
+            return None
+        return True, {
+            'columnHeadersCount': 1,
+            'headerOrientation': 'horizontal',
+            'headers': [[{'displayName': 'Instrument'},
+                         {'displayName': self.display_names.get(target_symbol_type, target_symbol_type), 'field': target_symbol_type}]],
+            'rowHeadersCount': 1,
+            'totalColumnsCount': 2,
+            'totalRowsCount': 2,
+            'data': [[symbol, value]]
+        }
+
+
+# Return the rows of a reference CSV file as lists of index_fields values
+def _read_rows(csv_file):
+    with open(csv_file, newline='', encoding='utf-8-sig') as reference_csv:
+        reader = csv.reader(reference_csv)
+        header = next(reader, [])
+        columns = [(index_fields.index(column_aliases[name.strip().lower()]), position)
+                   for position, name in enumerate(header) if name.strip().lower() in column_aliases]
+        if not columns:
+            raise ValueError('%s does not have any of the %s columns' % (csv_file, ', '.join(index_fields)))
+        for row in reader:
+            values = [''] * len(index_fields)
+            for field_number, position in columns:
+                if position < len(row):
+                    values[field_number] = row[position].strip()
+            if any(values):
+                yield values
+
+
+'''
+Build an index file from a CSV file with a header row of RIC, ISIN, SEDOL, CUSIP, lipperID and OAPermID columns
+(or their TR.* field names). The CSV file is read twice, the slot table is built in memory. Returns the number of records.
+'''
+def build_reference_index(csv_file, index_file):
+    widths = [1] * len(index_fields)
+    record_count = 0
+    key_count = 0
+    for values in _read_rows(csv_file):
+        encoded = [value.encode('utf-8') for value in values]
+        widths = [max(width, len(value)) for width, value in zip(widths, encoded)]
+        record_count += 1
+        key_count += sum(1 for value in encoded if value)
+
+    slot_count = 1
+    while slot_count < key_count * 2 + 1:  # Load factor <= 0.5 for short probe sequences
+        slot_count *= 2
+    record_width = sum(widths)
+
+    # Reserve the header space with the largest offsets, the final (not longer) metadata is written at the end
+    metadata = {'fields': index_fields, 'display_names': display_names, 'widths': widths, 'record_width': record_width,
+                'record_count': record_count, 'slot_count': slot_count, 'records_offset': 10 ** 15, 'slots_offset': 10 ** 15}
+    header_size = _header.size + len(json.dumps(metadata).encode('utf-8'))
+    records_offset = (header_size + 7) // 8 * 8
+    slots_offset = (records_offset + record_count * record_width + 7) // 8 * 8
+
+    slots = bytearray(slot_count * _slot.size)
+    slot_mask = slot_count - 1
+    temporary_file = index_file + '.tmp'
+    with open(temporary_file, 'wb') as index:
+        index.write(b'\0' * records_offset)
+        for record_number, values in enumerate(_read_rows(csv_file)):
+            encoded = [value.encode('utf-8') for value in values]
+            index.write(b''.join(value.ljust(width, b'\0') for value, width in zip(encoded, widths)))
+            for field_number, value in enumerate(encoded):
+                if not value:
+                    continue
+                key = value.upper()
+                slot = zlib.crc32(key) & slot_mask
+                while True:
+                    record, stored_field_number = _slot.unpack_from(slots, slot * _slot.size)
+                    if not record:
+                        _slot.pack_into(slots, slot * _slot.size, record_number + 1, field_number)
+                        break
+                    if record - 1 == record_number and encoded[stored_field_number].upper() == key:
+                        break  # The same identifier in another field of the same record
+                    slot = (slot + 1) & slot_mask
+        index.write(b'\0' * (slots_offset - index.tell()))
+        index.write(slots)
+
+        metadata['records_offset'] = records_offset
+        metadata['slots_offset'] = slots_offset
+        encoded_metadata = json.dumps(metadata).encode('utf-8')
+        index.seek(0)
+        index.write(_header.pack(index_magic, len(encoded_metadata)) + encoded_metadata)
+    os.replace(temporary_file, index_file)
+    return record_count
+
+
+usage = '''Usage: python reference_index.py -i <reference csv> -o <index file>
+    -i, --input=<file>      CSV file with a header row of RIC, ISIN, SEDOL, CUSIP, lipperID and OAPermID columns
+    -o, --output=<file>     index file to create (set REFERENCE_INDEX_FILE to this file for the chat bot)
+'''
+
+# =============================== Main Process, build the reference index file ============================
+if __name__ == '__main__':
+
+    options = {}
+    try:
+        opts, args = getopt.getopt(sys.argv[1:], 'hi:o:', ['help', 'input=', 'output='])
+    except getopt.GetoptError as error:
+        print(error)
+        print(usage)
+        sys.exit(2)
+
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            print(usage)
+            sys.exit(0)
+        elif opt in ('-i', '--input'):
+            options['input'] = arg
+        elif opt in ('-o', '--output'):
+            options['output'] = arg
+
+    if not options.get('input') or not options.get('output'):
+        print(usage)
+        sys.exit(2)
+
+    print('Building %s from %s' % (options['output'], options['input']))
+    records = build_reference_index(options['input'], options['output'])
+    print('Indexed %d instruments, %d bytes' % (records, os.path.getsize(options['output'])))
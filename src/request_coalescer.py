@@ -0,0 +1,96 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |    Single-flight coalescing of concurrent identical conversion requests   --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for thread operations
+import threading
+
+
+class Flight:
+
+    # An in-flight request result, the waiting threads are released when the result is set
+    def __init__(self):
+        self._done = threading.Event()
+        self.result = None
+
+    def set_result(self, result):
+        self.result = result
+        self._done.set()
+
+    def wait(self, timeout=None):
+        self._done.wait(timeout)
+        return self.result
+
+
+class RequestCoalescer:
+
+    '''
+    Merge concurrent requests for the same key, only the first thread (the leader) sends the upstream request
+    and the other threads wait for the leader result.
+        owned, waiting = coalescer.join(keys)
+        try:
+            ... request the owned keys and call coalescer.complete(key, result) for each owned key
+        finally:
+            coalescer.release(owned)
+        results of the waiting keys = flight.wait()
+    '''
+
+    # Coalescer statistics
+    requests = 0  # number of join() calls
+    upstream_keys = 0  # keys requested by a leader
+    coalesced_keys = 0  # keys served by another thread's in-flight request
+    saved_calls = 0  # join() calls that did not need any upstream request
+
+    # Constructor function
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    # Register the keys, returns the list of keys this thread must request and a dictionary of key and Flight of the other threads
+    def join(self, keys):
+        owned = []
+        waiting = {}
+        with self._lock:
+            self.requests += 1
+            for key in keys:
+                flight = self._flights.get(key)
+                if flight is None:
+                    self._flights[key] = Flight()
+                    owned.append(key)
+                else:
+                    waiting[key] = flight
+            self.upstream_keys += len(owned)
+            self.coalesced_keys += len(waiting)
+            if keys and not owned:
+                self.saved_calls += 1
+        return owned, waiting
+
+    # Publish the result of an owned key to the waiting threads
+    def complete(self, key, result):
+        with self._lock:
+            flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.set_result(result)
+
+    # Release the owned keys that have not been completed (e.g. on an exception), the waiting threads get the default result
+    def release(self, keys, result=None):
+        for key in keys:
+            self.complete(key, result)
+
+    # Return coalescer statistics for logging/monitoring purpose
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'in_flight': len(self._flights),
+                'upstream_keys': self.upstream_keys,
+                'coalesced_keys': self.coalesced_keys,
+                'saved_calls': self.saved_calls
+            }
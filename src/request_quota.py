@@ -0,0 +1,130 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |      Per-sender and per-chatroom quotas of the conversion requests        --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for thread and time operations
+import threading
+import time
+from collections import OrderedDict
+
+from rate_limiter import TokenBucket
+
+
+class RequestQuota:
+
+    '''
+    Token bucket quotas of the symbology conversions of each sender and each chatroom. A request costs one token per
+    (symbol, target symbol type) conversion. consume() rejects a request that costs more than the sender or chatroom
+    burst, acquire() takes a larger cost in burst-sized parts (e.g. a bulk conversion chunk). A rate of 0 disables the sender or chatroom quota. The buckets and usage of the least recently seen
+    max_entries senders/chatrooms are kept.
+    '''
+
+    # Quota parameters, rates are conversions per second
+    sender_rate = 2
+    sender_burst = 60
+    room_rate = 10
+    room_burst = 200
+    max_entries = 10000
+
+    # Constructor function
+    def __init__(self, sender_rate=2, sender_burst=60, room_rate=10, room_burst=200, max_entries=10000):
+        self.sender_rate = sender_rate
+        self.sender_burst = sender_burst
+        self.room_rate = room_rate
+        self.room_burst = room_burst
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (scope, key) -> [TokenBucket, usage dictionary]
+        self._lock = threading.Lock()
+
+    def _entry(self, scope, key):
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None:
+                rate, burst = (self.sender_rate, self.sender_burst) if scope == 'sender' else (self.room_rate, self.room_burst)
+                entry = self._entries[(scope, key)] = [TokenBucket(rate, burst), {'requests': 0, 'conversions': 0, 'throttled': 0}]
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end((scope, key))
+            return entry
+
+    '''
+    Take cost tokens from the sender and chatroom buckets. Returns None if the request is allowed, otherwise
+    a ('sender' or 'room', seconds to wait) tuple of the exceeded quota (no tokens are taken). The seconds to wait
+    are None if the cost is more than the burst of the quota, the request can never be allowed.
+    '''
+    def consume(self, sender, room_id, cost=1):
+        exceeded = None
+        for scope, key in (('sender', sender), ('room', room_id)):
+            bucket, _ = self._entry(scope, key)
+            if bucket.rate > 0 and cost > bucket.capacity:
+                exceeded = (scope, None)
+                break
+        else:
+            exceeded = self._take(sender, room_id, cost)
+        self._record(sender, room_id, cost, exceeded)
+        return exceeded
+
+    '''
+    Block until the sender and chatroom buckets have cost tokens and take them (e.g. each chunk of a bulk conversion),
+    a cost that is more than the burst is taken in burst-sized parts. Returns the seconds spent waiting,
+    a waiting request is not counted as throttled.
+    '''
+    def acquire(self, sender, room_id, cost=1):
+        sender_bucket, _ = self._entry('sender', sender)
+        room_bucket, _ = self._entry('room', room_id)
+        part_size = min([bucket.capacity for bucket in (sender_bucket, room_bucket) if bucket.rate > 0] or [cost])
+        waited = 0.0
+        remaining = cost
+        while remaining > 0:
+            part = min(remaining, part_size)
+            exceeded = self._take(sender, room_id, part)
+            while exceeded:
+                time.sleep(exceeded[1])
+                waited += exceeded[1]
+                exceeded = self._take(sender, room_id, part)
+            remaining -= part
+        self._record(sender, room_id, cost, None)
+        return waited
+
+    # Take the tokens of both buckets or none of them, returns None or the exceeded quota tuple
+    def _take(self, sender, room_id, cost):
+        sender_bucket, _ = self._entry('sender', sender)
+        room_bucket, _ = self._entry('room', room_id)
+
+        wait = sender_bucket.consume(cost)
+        if wait:
+            return 'sender', wait
+        wait = room_bucket.consume(cost)
+        if wait:
+            sender_bucket.refund(cost)
+            return 'room', wait
+        return None
+
+    def _record(self, sender, room_id, cost, exceeded):
+        _, sender_usage = self._entry('sender', sender)
+        _, room_usage = self._entry('room', room_id)
+        with self._lock:
+            for usage in (sender_usage, room_usage):
+                usage['requests'] += 1
+                if exceeded:
+                    usage['throttled'] += 1
+                else:
+                    usage['conversions'] += cost
+
+    # Return the usage of a sender or chatroom (scope 'sender' or 'room'): requests, conversions, throttled and available tokens
+    def usage(self, scope, key):
+        bucket, usage = self._entry(scope, key)
+        with self._lock:
+            usage = dict(usage)
+        usage['available'] = bucket.available()
+        usage['rate'] = bucket.rate
+        usage['burst'] = bucket.capacity
+        return usage
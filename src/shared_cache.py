@@ -0,0 +1,71 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# | Symbology cache and quotas shared by the bot workers over a local socket --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for multiprocessing operations
+import os
+from multiprocessing.managers import BaseManager
+
+from symbology_cache import SymbologyCache
+from request_quota import RequestQuota
+
+# The cache and quota objects of the manager server process
+_symbology_cache = None
+_request_quota = None
+
+
+def _create_cache(max_size, ttl, not_found_ttl, quota_settings):
+    global _symbology_cache, _request_quota
+    _symbology_cache = SymbologyCache(max_size, ttl, not_found_ttl)
+    _request_quota = RequestQuota(*quota_settings)
+
+
+def _get_cache():
+    return _symbology_cache
+
+
+def _get_quota():
+    return _request_quota
+
+
+class SymbologyCacheManager(BaseManager):
+
+    '''
+    Multiprocessing manager that serves one SymbologyCache object and one RequestQuota object on a local socket. The worker
+    processes connect to the manager address and use the returned proxies like a SymbologyCache object (get, put, clear,
+    stats) and a RequestQuota object (consume, acquire, usage), each call is one local socket round trip to the manager process.
+    '''
+
+
+SymbologyCacheManager.register('symbology_cache', callable=_get_cache, exposed=('get', 'put', 'clear', 'stats', '__len__'))
+SymbologyCacheManager.register('request_quota', callable=_get_quota, exposed=('consume', 'acquire', 'usage'))
+
+
+# Start the cache manager process, returns the started manager and its authkey. The manager address and the authkey are
+# passed to connect_shared_cache() and connect_shared_quota(). quota_settings are the RequestQuota constructor arguments
+def start_shared_cache(max_size=10000, ttl=3600, not_found_ttl=60, ctx=None, quota_settings=()):
+    authkey = os.urandom(16)
+    manager = SymbologyCacheManager(address=('127.0.0.1', 0), authkey=authkey, ctx=ctx)
+    manager.start(_create_cache, (max_size, ttl, not_found_ttl, tuple(quota_settings)))
+    return manager, authkey
+
+
+# Connect to the cache manager of another process, returns the SymbologyCache proxy
+def connect_shared_cache(address, authkey):
+    manager = SymbologyCacheManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.symbology_cache()
+
+
+# Connect to the cache manager of another process, returns the RequestQuota proxy
+def connect_shared_quota(address, authkey):
+    manager = SymbologyCacheManager(address=address, authkey=authkey)
+    manager.connect()
+    return manager.request_quota()
@@ -0,0 +1,113 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |     "Did you mean" symbol suggestions with a deletion variant index       --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for thread operations
+import threading
+
+from symbology_cache import normalize_symbol
+
+
+# Return the Levenshtein edit distance of two strings
+def edit_distance(source, target):
+    if source == target:
+        return 0
+    if len(source) < len(target):
+        source, target = target, source
+    previous = list(range(len(target) + 1))
+    for row, source_char in enumerate(source, start=1):
+        current = [row]
+        for column, target_char in enumerate(target, start=1):
+            current.append(min(previous[column] + 1,  # deletion
+                               current[column - 1] + 1,  # insertion
+                               previous[column - 1] + (source_char != target_char)))  # substitution
+        previous = current
+    return previous[-1]
+
+
+# Return the length of the common prefix of two strings
+def _common_prefix_length(source, target):
+    length = 0
+    for source_char, target_char in zip(source, target):
+        if source_char != target_char:
+            break
+        length += 1
+    return length
+
+
+class SymbolSuggester:
+
+    '''
+    Index of the symbols that were converted successfully, for answering a not found symbol with the closest known symbols.
+    Each symbol is indexed under itself and all its one-character deletion variants ('IBM.N' -> 'BM.N', 'IM.N', ...).
+    A search looks up the deletion variants of the requested symbol, so the candidates that are one deletion apart on
+    each side (one substitution, insertion, deletion or transposition, and most two-edit typos) are found with
+    len(symbol) + 1 dictionary lookups. The candidates within max_distance edits are ranked by edit distance,
+    then by the longest common prefix. Up to max_size symbols are indexed, the later symbols are ignored.
+    '''
+
+    # Suggester parameters
+    max_distance = 2
+    max_suggestions = 3
+    max_size = 50000
+
+    # Constructor function
+    def __init__(self, max_distance=2, max_suggestions=3, max_size=50000):
+        self.max_distance = max_distance
+        self.max_suggestions = max_suggestions
+        self.max_size = max_size
+        self._symbols = set()
+        self._variants = {}  # deletion variant -> list of symbols
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def __contains__(self, symbol):
+        return normalize_symbol(symbol) in self._symbols
+
+    # Return the symbol and its one-character deletion variants
+    @staticmethod
+    def _deletion_variants(key):
+        variants = {key}
+        for index in range(len(key)):
+            variants.add(key[:index] + key[index + 1:])
+        return variants
+
+    # Add a known symbol, returns True if the symbol is new
+    def add(self, symbol):
+        key = normalize_symbol(symbol)
+        if not key:
+            return False
+        with self._lock:
+            if key in self._symbols or len(self._symbols) >= self.max_size:
+                return False
+            self._symbols.add(key)
+            for variant in self._deletion_variants(key):
+                self._variants.setdefault(variant, []).append(key)
+        return True
+
+    # Return up to max_suggestions known symbols within max_distance edits of symbol (the symbol itself is not included)
+    def suggest(self, symbol):
+        key = normalize_symbol(symbol)
+        if not key:
+            return []
+        candidates = set()
+        with self._lock:
+            for variant in self._deletion_variants(key):
+                candidates.update(self._variants.get(variant, ()))
+        candidates.discard(key)
+        matches = []
+        for candidate in candidates:
+            distance = edit_distance(key, candidate)
+            if distance <= self.max_distance:
+                matches.append((distance, -_common_prefix_length(key, candidate), candidate))
+        matches.sort()
+        return [match[2] for match in matches[:self.max_suggestions]]
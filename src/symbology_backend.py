@@ -0,0 +1,148 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |     Symbology backends: Eikon Data API and a local fixture file           --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for JSON, time and asyncio operations
+import json
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+
+from symbology_cache import normalize_symbol
+from reference_index import display_names
+
+
+class SymbologyBackend(ABC):
+
+    '''
+    Source of the symbology conversion data for DAPISessionManagement. get_data(instruments, fields) returns a raw response
+    with the same structure as ek.get_data(instruments, fields, raw_output=True): 'headers', one 'data' row per instrument
+    and an 'error' list of {'code', 'col', 'message', 'row'} entries for the values that are not found.
+    A failed request raises an exception.
+    '''
+
+    name = 'backend'
+
+    # Return True if the backend can serve requests (e.g. Refinitiv Workspace is running)
+    @abstractmethod
+    def is_available(self):
+        pass
+
+    # Request a batch of instruments and fields, returns the raw response
+    @abstractmethod
+    def get_data(self, instruments, fields):
+        pass
+
+    # Request a batch of instruments and fields from a coroutine, the default implementation runs get_data in the default executor
+    async def get_data_async(self, instruments, fields):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get_data, instruments, fields)
+
+
+class EikonBackend(SymbologyBackend):
+
+    '''
+    Eikon Data API backend, it needs Refinitiv Workspace/Eikon Desktop on the local machine.
+    The eikon module is imported and the App Key is set on the first request, not when the backend is created.
+    '''
+
+    name = 'eikon'
+
+    # Constructor function
+    def __init__(self, app_key):
+        self.app_key = app_key
+        self._ek = None
+
+    def _eikon(self):
+        if self._ek is None:
+            import eikon as ek
+            ek.set_app_key(self.app_key)
+            self._ek = ek
+        return self._ek
+
+    # verify if Eikon Data API is connect to Refinitiv Workspace/Eikon Desktop application
+    def is_available(self):
+        return self._eikon().get_port_number()
+
+    def get_data(self, instruments, fields):
+        return self._eikon().get_data(instruments, fields, raw_output=True)
+
+
+class FixtureBackend(SymbologyBackend):
+
+    '''
+    Deterministic in-process backend for tests, benchmarks and demos without Refinitiv Workspace. The fixture file is a
+    JSON file of {"instruments": [{"TR.RIC": "IBM.N", "TR.ISIN": "US4592001014", ...}, ...]}, any field value of an
+    instrument resolves to its other fields. latency adds a fixed delay to each request.
+    '''
+
+    name = 'fixture'
+
+    # Constructor function
+    def __init__(self, fixture_file, latency=0):
+        self.fixture_file = fixture_file
+        self.latency = latency
+        with open(fixture_file, encoding='utf-8') as fixture:
+            instruments = json.load(fixture)['instruments']
+        self._instruments = {}
+        for instrument in instruments:
+            for value in instrument.values():
+                if value:
+                    self._instruments.setdefault(normalize_symbol(value), instrument)
+        logging.info('Fixture backend: loaded %d instruments from %s' % (len(instruments), fixture_file))
+
+    def is_available(self):
+        return True
+
+    def get_data(self, instruments, fields):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._response(instruments, fields)
+
+    async def get_data_async(self, instruments, fields):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._response(instruments, fields)
+
+    def _response(self, instruments, fields):
+        instruments = [instruments] if isinstance(instruments, str) else list(instruments)
+        fields = [fields] if isinstance(fields, str) else list(fields)
+        response = {
+            'columnHeadersCount': 1,
+            'headerOrientation': 'horizontal',
+            'headers': [[{'displayName': 'Instrument'}] + [{'displayName': display_names.get(field, field), 'field': field} for field in fields]],
+            'rowHeadersCount': 1,
+            'totalColumnsCount': len(fields) + 1,
+            'totalRowsCount': len(instruments) + 1,
+            'data': []
+        }
+        errors = []
+        for row_index, instrument in enumerate(instruments):
+            values = self._instruments.get(normalize_symbol(instrument), {})
+            row = [instrument]
+            for column_index, field in enumerate(fields, start=1):
+                value = values.get(field) or None
+                if value is None:
+                    errors.append({'code': 412, 'col': column_index, 'message': 'Unable to resolve all requested identifiers.', 'row': row_index})
+                row.append(value)
+            response['data'].append(row)
+        if errors:
+            response['error'] = errors
+        return response
+
+
+# Create a backend by name: 'eikon' (app_key) or 'fixture' (fixture_file, latency)
+def create_backend(name='eikon', app_key=None, fixture_file=None, latency=0):
+    if name == 'eikon':
+        return EikonBackend(app_key)
+    if name == 'fixture':
+        return FixtureBackend(fixture_file, latency)
+    raise ValueError('Unknown symbology backend %s, the supported backends are eikon and fixture' % name)
@@ -0,0 +1,109 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |       In-memory symbology conversion result cache (TTL + LRU eviction)    --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for cache operations
+import threading
+import time
+from collections import OrderedDict
+
+
+# Normalize the requested symbol, so 'ibm.n ' and 'IBM.N' share the same cache entry
+def normalize_symbol(symbol):
+    return symbol.strip().upper()
+
+
+class SymbologyCache:
+
+    # Cache parameters
+    max_size = 10000
+    ttl = 3600  # seconds a successful conversion result stays valid
+    not_found_ttl = 60  # seconds a 'not found' conversion result stays valid
+
+    # Cache statistics
+    hits = 0
+    misses = 0
+    evictions = 0
+    expirations = 0
+    stale_hits = 0
+
+    # Constructor function
+    def __init__(self, max_size=10000, ttl=3600, not_found_ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.not_found_ttl = not_found_ttl
+        # OrderedDict keeps the entries in LRU order, the least recently used entry is the first item
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Build a cache key from the requested symbol and the target Workspace field (e.g. 'TR.ISIN')
+    def make_key(self, symbol, target_symbol_type):
+        return normalize_symbol(symbol), target_symbol_type
+
+    '''
+    Get a cached conversion result. Returns a (converted_result, response) tuple
+    or None if the entry does not exist or is already expired.
+    The expired entries stay in the cache until they are replaced or evicted, allow_stale=True returns them
+    (e.g. when the Data API is not available).
+    '''
+    def get(self, symbol, target_symbol_type, allow_stale=False):
+        key = self.make_key(symbol, target_symbol_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_tm, converted_result, response = entry
+            if expires_tm <= time.monotonic():  # Entry expired
+                if allow_stale:
+                    self.stale_hits += 1
+                    return converted_result, response
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return converted_result, response
+
+    # Add a conversion result to the cache. 'Not found' results use the shorter not_found_ttl value
+    def put(self, symbol, target_symbol_type, converted_result, response):
+        ttl = self.ttl if converted_result else self.not_found_ttl
+        if ttl <= 0:
+            return
+        key = self.make_key(symbol, target_symbol_type)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, converted_result, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:  # Evict the least recently used entries
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Remove all cached entries
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # Return cache statistics for logging/monitoring purpose
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'stale_hits': self.stale_hits,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0
+            }
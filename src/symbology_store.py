@@ -0,0 +1,123 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |     Persistent SQLite symbology conversion store for warm restarts        --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for SQLite and JSON operations
+import sqlite3
+import threading
+import time
+import json
+import logging
+
+from symbology_cache import normalize_symbol
+
+
+class SymbologyStore:
+
+    # Store parameters
+    db_file = './symbology-store.db'
+    max_age = 86400  # seconds a stored conversion result is still used after it has been saved
+    batch_size = 100  # number of pending results that triggers a write
+    flush_interval = 5  # seconds between background writes
+
+    # Constructor function. The database file is opened lazily on the first lookup or write.
+    def __init__(self, db_file='./symbology-store.db', max_age=86400, batch_size=100, flush_interval=5):
+        self.db_file = db_file
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._connection = None
+        self._connection_lock = threading.Lock()  # the SQLite connection and its reads and writes
+        self._lock = threading.Lock()  # the pending results list, put() does not wait for the database writes
+        self._pending = []
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._writer = None
+
+    # Open the SQLite database file and create the conversion table if it does not exist
+    def _connect(self):
+        if self._connection is None:
+            logging.info('Symbology Store: open %s' % self.db_file)
+            self._connection = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS symbology ('
+                                     'symbol TEXT NOT NULL, '
+                                     'target_symbol_type TEXT NOT NULL, '
+                                     'response TEXT NOT NULL, '
+                                     'updated_tm REAL NOT NULL, '
+                                     'PRIMARY KEY (symbol, target_symbol_type))')
+            self._connection.commit()
+        return self._connection
+
+    # Start the background writer thread
+    def start(self):
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._run_writer, name='symbology-store-writer', daemon=True)
+            self._writer.start()
+
+    '''
+    Get a stored conversion response. Returns None if the symbol has never been converted
+    or the stored result is older than max_age (allow_stale=True returns the older results too).
+    '''
+    def get(self, symbol, target_symbol_type, allow_stale=False):
+        with self._connection_lock:
+            try:
+                row = self._connect().execute(
+                    'SELECT response, updated_tm FROM symbology WHERE symbol = ? AND target_symbol_type = ?',
+                    (normalize_symbol(symbol), target_symbol_type)).fetchone()
+            except sqlite3.Error as error:
+                logging.error('Symbology Store: read failure: %s' % error)
+                return None
+
+        if row is None or (row[1] + self.max_age < time.time() and not allow_stale):
+            return None
+        return json.loads(row[0])
+
+    # Queue a successful conversion response to be written by the background writer
+    def put(self, symbol, target_symbol_type, response):
+        with self._lock:
+            self._pending.append((normalize_symbol(symbol), target_symbol_type, json.dumps(response), time.time()))
+            if len(self._pending) >= self.batch_size:
+                self._wakeup.set()
+
+    # Write all pending conversion responses to the database file in a single transaction, the pending list is swapped out
+    # under _lock and written outside of it
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, []
+        with self._connection_lock:
+            try:
+                connection = self._connect()
+                connection.executemany('INSERT OR REPLACE INTO symbology '
+                                       '(symbol, target_symbol_type, response, updated_tm) VALUES (?, ?, ?, ?)', pending)
+                connection.commit()
+                logging.debug('Symbology Store: saved %d conversion results' % len(pending))
+            except sqlite3.Error as error:
+                logging.error('Symbology Store: write failure: %s' % error)
+
+    def _run_writer(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    # Stop the background writer, write the pending results and close the database file
+    def close(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+        self.flush()
+        with self._connection_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
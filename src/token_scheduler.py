@@ -0,0 +1,129 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |     Background RDP token refresh scheduler with in-memory token state     --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for thread and time operations
+import threading
+import random
+import time
+import logging
+
+
+class TokenRefreshScheduler:
+
+    '''
+    Keep the current RDP token in memory and refresh it on a background thread before it expires.
+        - The refresh starts refresh_margin seconds (minus a random jitter) before the token expires.
+        - A failed refresh is retried with exponential backoff, starting from retry_delay up to max_retry_delay seconds.
+        - Each on_refresh(access_token) callback runs on the scheduler thread after a successful refresh,
+          e.g. for sending the WebSocket 'authenticate' request.
+    Any thread can read access_token without I/O.
+    '''
+
+    # Scheduler parameters
+    refresh_margin = 60  # seconds
+    jitter = 10  # seconds
+    retry_delay = 1  # seconds
+    max_retry_delay = 30  # seconds
+
+    # Constructor function
+    def __init__(self, rdp_token, refresh_margin=60, jitter=10, retry_delay=1, max_retry_delay=30):
+        self.rdp_token = rdp_token
+        self.refresh_margin = refresh_margin
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._lock = threading.Lock()
+        self._access_token = None
+        self._refresh_token = None
+        self._expires_tm = 0
+        self._callbacks = []
+        self._stopped = threading.Event()
+        self._thread = None
+
+        # Scheduler statistics
+        self.refresh_count = 0
+        self.failure_count = 0
+        self.last_refresh_duration = 0.0
+
+    @property
+    def access_token(self):
+        with self._lock:
+            return self._access_token
+
+    @property
+    def refresh_token(self):
+        with self._lock:
+            return self._refresh_token
+
+    # Return the seconds before the current access token expires
+    def expires_in(self):
+        with self._lock:
+            return self._expires_tm - time.time()
+
+    # Register a function that is called with the new access token after each successful refresh
+    def add_refresh_callback(self, on_refresh):
+        self._callbacks.append(on_refresh)
+
+    '''
+    Request a new token now with the current refresh token (or username/password if there is no refresh token).
+    Returns True if success. Based on WebSocket application behavior, the token is not read/written to rest-token.txt file.
+    '''
+    def refresh(self):
+        start_tm = time.perf_counter()
+        auth_obj = self.rdp_token.get_token(save_token_to_file=False, current_refresh_token=self.refresh_token)
+        self.last_refresh_duration = time.perf_counter() - start_tm
+        if not auth_obj:
+            self.failure_count += 1
+            return False
+
+        with self._lock:
+            self._access_token = auth_obj['access_token']
+            self._refresh_token = auth_obj['refresh_token']
+            self._expires_tm = time.time() + int(auth_obj['expires_in'])
+        self.refresh_count += 1
+        return True
+
+    # Start the background refresh thread, the first token must be requested with refresh() before
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='token-refresh-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    # Seconds to wait before the next refresh
+    def _next_refresh_delay(self):
+        expires_in = self.expires_in()
+        if expires_in > self.refresh_margin:
+            return max(0, expires_in - self.refresh_margin - random.uniform(0, self.jitter))
+        # The token lifetime is too short for the refresh margin, refresh at the half of the remaining time
+        return max(0, expires_in / 2)
+
+    def _run(self):
+        while not self._stopped.wait(self._next_refresh_delay()):
+            retry_delay = self.retry_delay
+            while not self.refresh():
+                logging.error('RDP token refresh failure, retry in %s seconds' % retry_delay)
+                if self._stopped.wait(retry_delay):
+                    return
+                retry_delay = min(retry_delay * 2, self.max_retry_delay)
+
+            logging.info('RDP token refreshed in %.3f seconds' % self.last_refresh_duration)
+            for on_refresh in self._callbacks:
+                try:
+                    on_refresh(self.access_token)
+                except Exception as error:
+                    logging.error('Token refresh callback failure: %s' % error)
@@ -0,0 +1,151 @@
+# |-----------------------------------------------------------------------------
+# |            This source code is provided under the Apache 2.0 license      --
+# |  and is provided AS IS with no warranty or guarantee of fit for purpose.  --
+# |                See the project's LICENSE.md for details.                  --
+# |           Copyright Refinitiv 2020-2021. All rights reserved.             --
+# |-----------------------------------------------------------------------------
+
+# |-----------------------------------------------------------------------------
+# |     WebSocket connection supervisor with automatic reconnect              --
+# |-----------------------------------------------------------------------------
+
+# Import the required libraries for WebSocket and thread operations
+import threading
+import random
+import time
+import logging
+
+import websocket
+
+
+class WebSocketSupervisor:
+
+    '''
+    Run a websocket.WebSocketApp on a background thread and reconnect it with exponential backoff
+    (reconnect_delay doubled up to max_reconnect_delay seconds, plus a small jitter) when the connection is closed.
+    The on_open(supervisor) function is called on every (re)connection, e.g. for sending the 'connect' request
+    with the current access token. The application state (joined chatrooms, token) is kept, so a recovery costs
+    one WebSocket handshake only.
+    '''
+
+    # Reconnect parameters
+    reconnect_delay = 1  # seconds
+    max_reconnect_delay = 60  # seconds
+
+    # Constructor function
+    def __init__(self, url, on_message, on_open=None, on_error=None, subprotocols=None, sslopt=None,
+                 reconnect_delay=1, max_reconnect_delay=60):
+        self.url = url
+        self.on_message = on_message
+        self.on_open = on_open
+        self.on_error = on_error
+        self.subprotocols = subprotocols
+        self.sslopt = sslopt
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.web_socket_app = None
+        self._stopped = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Connection statistics
+        self.connected = False
+        self.connect_count = 0
+        self.reconnect_count = 0
+        self.total_downtime = 0.0  # seconds
+        self.last_downtime = 0.0  # seconds
+        self._disconnected_tm = None
+
+    # Start the WebSocket connection thread
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='websocket-supervisor')
+            self._thread.start()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # Close the connection and stop reconnecting
+    def stop(self):
+        self._stopped.set()
+        with self._lock:
+            web_socket_app = self.web_socket_app
+        if web_socket_app is not None:
+            web_socket_app.close()
+        self.join()
+
+    # Send a message to the current WebSocket connection
+    def send(self, data):
+        with self._lock:
+            web_socket_app = self.web_socket_app
+        if web_socket_app is None:
+            raise websocket.WebSocketConnectionClosedException('WebSocket is not connected')
+        web_socket_app.send(data)
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stopped.is_set():
+            web_socket_app = websocket.WebSocketApp(
+                self.url,
+                on_open=self._on_open,
+                on_message=self.on_message,
+                on_error=self._on_error,
+                on_close=self._on_close,
+                subprotocols=self.subprotocols)
+            with self._lock:
+                self.web_socket_app = web_socket_app
+            if self._stopped.is_set():
+                break
+            web_socket_app.run_forever(sslopt=self.sslopt)
+
+            with self._lock:
+                self.web_socket_app = None
+                if self.connected: # The connection was established, restart the backoff
+                    delay = self.reconnect_delay
+                self.connected = False
+                if self._disconnected_tm is None and self.connect_count > 0: # Downtime starts after the first connection
+                    self._disconnected_tm = time.monotonic()
+            if self._stopped.is_set():
+                break
+
+            wait = delay + random.uniform(0, delay / 10.0)
+            logging.warning('WebSocket Connection Closed, reconnect in %.1f seconds' % wait)
+            if self._stopped.wait(wait):
+                break
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _on_open(self, web_socket_app):
+        with self._lock:
+            self.connected = True
+            self.connect_count += 1
+            if self._disconnected_tm is not None: # Reconnection
+                self.last_downtime = time.monotonic() - self._disconnected_tm
+                self.total_downtime += self.last_downtime
+                self.reconnect_count += 1
+                self._disconnected_tm = None
+                logging.info('WebSocket reconnected after %.1f seconds downtime' % self.last_downtime)
+        if self.on_open is not None:
+            self.on_open(self)
+
+    def _on_error(self, web_socket_app, error):
+        if self.on_error is not None:
+            self.on_error(self, error)
+
+    def _on_close(self, web_socket_app, close_status_code=None, close_msg=None):
+        logging.error('Receive: onclose event. WebSocket Connection Closed %s %s' % (close_status_code, close_msg))
+
+    # Return connection statistics for logging/monitoring purpose
+    def stats(self):
+        with self._lock:
+            return {
+                'connected': self.connected,
+                'connect_count': self.connect_count,
+                'reconnect_count': self.reconnect_count,
+                'last_downtime_s': self.last_downtime,
+                'total_downtime_s': self.total_downtime
+            }